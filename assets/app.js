@@ -1,21 +1,30 @@
-// assets/app.js — ft6: show every occurrence (no nearby-merge)
+// assets/app.js — ft10: the catalogue table is pre-rendered (scripts/build_view.py); Documents only filters its rows;
+// full-text searches one language's manifest at a time (#lang); Matches fetch and link only the matching pages
 (function(){
   'use strict';
-  const Q_URL='data/a64_catalogue.json?v=ft6', Q_IDX='data/search_index.json?v=ft6';
+  const Q_IDX='data/search_index.json';
 
   const qEl=document.getElementById('q');
   const fulltextEl=document.getElementById('fulltextToggle');
   const hitsEl=document.getElementById('hits');
   const hitsHeaderEl=document.getElementById('hitsHeader');
   const tbodyEl=document.getElementById('doc-tbody');
+  const tableEl=document.getElementById('doc-table');
+  const statusEl=document.getElementById('doc-status');
+  const langEl=document.getElementById('lang');
+  const LANG_NAMES={en:'English',fr:'Français',es:'Español',ar:'العربية',zh:'中文',ru:'Русский'};
+  const Q_VIEW=(tableEl&&tableEl.dataset.view)||'data/catalogue_view.json';
 
   // keep same spacing
   (function(){ const s=document.createElement('style'); s.textContent='.hitlist{display:grid;grid-template-columns:1fr;row-gap:16px;margin-top:8px}.hitlist .hit{padding:14px 16px;border-radius:10px}'; document.head.appendChild(s); })();
 
-  const state={CATALOG:[],INDEX:[],ready:false};
-  const esc=s=>(s||'').replace(/[&<>"]/g,m=>({'&':'&amp;','<':'&lt;','>':'&gt;'}[m]));
+  const state={VIEW:null,INDEX:null,ready:false,seq:0};
+  const P=window.PACM_postings;
+  const esc=s=>(s||'').replace(/[&<>"]/g,m=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;'}[m]));
   const norm=s=>(s||'').toString().toLowerCase();
   const toPdfUrl=(u,q)=>u+(q?'#search='+encodeURIComponent(q.replace(/"/g,'')):'');
+  // a hit on a known page opens the PDF there (the row's own fragment, e.g. #5CMA6, only names the row)
+  const toPageUrl=(u,n,q)=>u.split('#')[0]+'#page='+n+(q?'&search='+encodeURIComponent(q.replace(/"/g,'')):'');
 
   // ---- helpers (same as before, but minGap=0) ----
   const MAX_PER_DOC=500, MAX_TOTAL=5000, SNIP=110;
@@ -28,9 +37,17 @@
 
   function parse(q){const out=[]; const re=/"([^"]+)"|(\S+)/g; let a; while((a=re.exec(q))) out.push((a[1]||a[2]).toLowerCase()); return out;}
   const hayMeta=r=>norm([r.title,r.symbol,r.section,r.subsection,r.notes].filter(Boolean).join(' • '));
-  const hayFull=r=>norm(r.text||''); const andIn=(h,t)=>t.every(w=>h.includes(w));
+  const hayFull=r=>r.lc||norm(r.text||''); const andIn=(h,t)=>t.every(w=>h.includes(w));
 
-  function searchDocs(cat,q,full){const t=parse(q); if(!t.length) return cat.slice(); if(!full) return cat.filter(r=>andIn(hayMeta(r),t)); const urls=new Set(); for(const rec of state.INDEX){const h=hayFull(rec); if(h&&andIn(h,t)) urls.add(rec.url);} return cat.filter(r=>urls.has(r.url)||andIn(hayMeta(r),t));}
+  // records come from data/manifest.json + per-document text shards; the monolithic index is only a fallback
+  // one record per PDF; catalogue rows pointing at the same PDF are listed as aliases sharing its text
+  const expand=r=>[r].concat((r.aliases||[]).map(a=>Object.assign({},r,a)));
+  function rawIndex(){ if(!state.INDEX) state.INDEX=fetch(Q_IDX).then(r=>r.json()).then(i=>Array.isArray(i)?i.flatMap(expand):[]).catch(_=>[]); return state.INDEX; }
+  async function loadIndex(urls,withText){ try{ if(P) return await P.records(urls,withText); }catch(e){} const all=await rawIndex(); return urls? all.filter(r=>urls.has(r.url)) : all; }
+  async function fullUrls(q){ try{ const u=P && await P.match(q); if(u) return u; }catch(e){} const t=parse(q), urls=new Set(); for(const rec of await rawIndex()){const h=hayFull(rec); if(h&&andIn(h,t)) urls.add(rec.url);} return urls; }
+  // full-text hits: only the pages the postings put the matches on; whole texts when that is unavailable
+  async function loadPages(q){ try{ const r=P && await P.pages(q); if(r) return r; }catch(e){} return loadIndex(await fullUrls(q),true); }
+  async function searchDocs(cat,q,full){const t=parse(q); if(!t.length) return cat.slice(); if(!full) return cat.filter(r=>andIn(hayMeta(r),t)); const urls=await fullUrls(q); return cat.filter(r=>urls.has(r.url)||andIn(hayMeta(r),t));}
 
   function searchHits(index,raw,full){
     const q=(raw||'').trim(); if(!q) return [];
@@ -38,7 +55,7 @@
     for(const rec of index){
       const base = full ? hayFull(rec) : hayMeta(rec);
       if(!base) continue;
-      const txt = clean(base);
+      const txt = (full&&rec.norm)? base : clean(base); // build-time normalised text needs no clean()
       const R = regs(q); if(!R.length) continue;
       let rr=[];
       if(R.length===1){ rr = ranges(txt, new RegExp(R[0], R[0].flags)); }
@@ -46,7 +63,7 @@
       if(!rr.length) continue;
       rr = merge(rr, 0).slice(0, MAX_PER_DOC); // <- only overlap merge
       for(const r of rr){
-        out.push({ url: toPdfUrl(rec.url,q), title: rec.title||'(untitled)', symbol: rec.symbol||'', section: rec.section||'', subsection: rec.subsection||'', snippet: snip(txt, r, q) });
+        out.push({ url: rec.page? toPageUrl(rec.url,rec.page,q) : toPdfUrl(rec.url,q), page: rec.page||null, title: rec.title||'(untitled)', symbol: rec.symbol||'', section: rec.section||'', subsection: rec.subsection||'', snippet: snip(txt, r, q) });
         total++; if(total>=MAX_TOTAL) break;
       }
       if(total>=MAX_TOTAL) break;
@@ -57,16 +74,35 @@
   // minimal renderers (reuse your existing DOM structure)
   function setHeader(t){ if(hitsHeaderEl) hitsHeaderEl.textContent=t||''; }
   function renderHits(rows,q,full){ if(!rows.length){ hitsEl.innerHTML=`<p class="error">No matches${full?' in document text':''}.</p>`; setHeader('No matches'); hitsEl.classList.remove('hidden'); if(hitsHeaderEl) hitsHeaderEl.classList.remove('hidden'); return; }
-    hitsEl.innerHTML = rows.map(r=>`<article class="hit"><header class="hit-h"><a href="${r.url}" target="_blank" rel="noopener">${esc(r.title)}</a>${r.symbol?` <span class="sym">(${esc(r.symbol)})</span>`:''}${r.section?` <span class="sec">— ${esc(r.section)}${r.subsection?' — '+esc(r.subsection):''}</span>`:''}</header><p class="hit-s">${r.snippet}</p></article>`).join('\n');
+    hitsEl.innerHTML = rows.map(r=>`<article class="hit"><header class="hit-h"><a href="${r.url}" target="_blank" rel="noopener">${esc(r.title)}</a>${r.symbol?` <span class="sym">(${esc(r.symbol)})</span>`:''}${r.page?` <span class="pg">p. ${r.page}</span>`:''}${r.section?` <span class="sec">— ${esc(r.section)}${r.subsection?' — '+esc(r.subsection):''}</span>`:''}</header><p class="hit-s">${r.snippet}</p></article>`).join('\n');
     setHeader(`${rows.length} match${rows.length===1?'':'es'}${full?' · Full-text':''}`);
     hitsEl.classList.remove('hidden'); if(hitsHeaderEl) hitsHeaderEl.classList.remove('hidden');
   }
-  function group(rows){const g=new Map(); for(const r of rows){const sec=(r.section||'Other').trim(); const sub=(r.subsection||'').trim(); if(!g.has(sec)) g.set(sec,new Map()); const m=g.get(sec); if(!m.has(sub)) m.set(sub,[]); m.get(sub).push(r);} return g;}
-  function rowHtml(r){const title=esc(r.title||'(untitled)'),url=esc(r.url||'#'),sym=esc(r.symbol||''),ver=esc(r.version||''),date=esc(r.date||''); return `<tr class="doc-row"><td class="cell-title"><a href="${url}" target="_blank" rel="noopener">${title}</a></td><td class="cell-symbol">${sym}</td><td class="cell-version">${ver}</td><td class="cell-date">${date}</td></tr>`;}
-  function renderDocs(rows){const g=group(rows), parts=[]; const secs=Array.from(g.keys()).sort((a,b)=>a.localeCompare(b)); for(const sec of secs){parts.push(`<tr class="group-row"><td colspan="4">${esc(sec)}</td></tr>`); const sub=g.get(sec); const subs=Array.from(sub.keys()).sort((a,b)=>(a||'').localeCompare(b||'')); for(const ss of subs){ if(ss) parts.push(`<tr class="subgroup-row"><td colspan="4">${esc(ss)}</td></tr>`); for(const r of sub.get(ss).slice().sort((a,b)=>(a.title||'').localeCompare(b.title||''))){ parts.push(rowHtml(r)); } } } tbodyEl.innerHTML=parts.join('\n'); }
+  function setStatus(t){ if(statusEl){ statusEl.textContent=t||''; statusEl.hidden=!t; } }
+  // data/catalogue_view.json: groups -> subsections -> rows (column order in v.columns), already deduped and sorted;
+  // row i (document order) is the <tr class="doc-row" data-i="i"> rendered into index.html
+  function loadView(){ if(!state.VIEW) state.VIEW=fetch(Q_VIEW).then(r=>{ if(!r.ok) throw new Error('HTTP '+r.status); return r.json(); }).then(v=>{ const rows=[]; for(const g of v.groups) for(const s of g.subsections) for(const a of s.rows){ const r={i:rows.length,section:g.section,subsection:s.subsection}; v.columns.forEach((c,k)=>{ r[c]=a[k]; }); rows.push(r); } return rows; }); return state.VIEW; }
+  function rowHtml(r){return `<tr class="doc-row" data-i="${r.i}"><td class="cell-title"><a href="${esc(r.url)||'#'}" target="_blank" rel="noopener">${esc(r.title)}</a></td><td class="cell-symbol">${esc(r.symbol)}</td><td class="cell-version">${esc(r.version)}</td><td class="cell-date">${esc(r.date)}</td></tr>`;}
+  // only when index.html was not built: the view is pre-grouped, so this is a single pass with no sorting
+  function paint(rows){const parts=[]; let sec=null, sub=null; for(const r of rows){ if(r.section!==sec){ sec=r.section; sub=null; parts.push(`<tr class="group-row"><td colspan="4">${esc(sec)}</td></tr>`); } if(r.subsection!==sub){ sub=r.subsection; if(sub) parts.push(`<tr class="subgroup-row"><td colspan="4">${esc(sub)}</td></tr>`); } parts.push(rowHtml(r)); } tbodyEl.innerHTML=parts.join('\n'); }
+  // show the matching rows and the headings that still have any, hide everything else
+  function renderDocs(rows){const keep=new Set(rows.map(r=>r.i)); let grp=null, sub=null, gAny=false, sAny=false;
+    for(const tr of tbodyEl.rows){ const c=tr.classList;
+      if(c.contains('group-row')){ if(sub) sub.hidden=!sAny; if(grp) grp.hidden=!gAny; grp=tr; sub=null; gAny=false; }
+      else if(c.contains('subgroup-row')){ if(sub) sub.hidden=!sAny; sub=tr; sAny=false; }
+      else { const show=keep.has(+tr.dataset.i); tr.hidden=!show; if(show){ gAny=true; sAny=true; } } }
+    if(sub) sub.hidden=!sAny; if(grp) grp.hidden=!gAny; }
 
+  // offer the indexed languages once the current manifest (which lists them all) is in
+  function initLang(){ if(!P||!langEl) return; P.manifest().then(m=>{ const codes=Object.keys(m.languages||{}); if(codes.length<2) return;
+      langEl.innerHTML=codes.map(c=>`<option value="${esc(c)}">${esc(LANG_NAMES[c]||c)} (${m.languages[c].docs})</option>`).join(''); langEl.value=m.lang||P.getLang(); langEl.hidden=false; }).catch(_=>null);
+    langEl.addEventListener('change', ()=>{ P.setLang(langEl.value); if(qEl) qEl.dispatchEvent(new Event('input')); }); }
   function view(){ const r=document.querySelector('input[name="view"]:checked'); return r? r.value : 'docs'; }
-  function run(){ if(!state.ready) return; const q=qEl? qEl.value : ''; const full=!!(fulltextEl&&fulltextEl.checked); const v=view(); if(v==='hits'){ const rows=searchHits(state.INDEX,q,full); renderHits(rows,q,full);} else { renderDocs(searchDocs(state.CATALOG,q,full)); } }
-  async function init(){ try{ const [c,i]=await Promise.all([fetch(Q_URL).then(r=>r.json()), fetch(Q_IDX).then(r=>r.json()).catch(_=>[])]); state.CATALOG=Array.isArray(c)?c:[]; state.INDEX=Array.isArray(i)?i:[]; state.ready=true; renderDocs(state.CATALOG); if(qEl) qEl.addEventListener('input', run); if(fulltextEl) fulltextEl.addEventListener('change', run); document.querySelectorAll('input[name="view"]').forEach(r=>r.addEventListener('change', run)); } catch(e){ if(tbodyEl) tbodyEl.innerHTML='<tr><td colspan="4">Could not load data.</td></tr>'; } }
+  async function run(){ if(!state.ready) return; const seq=++state.seq; const q=qEl? qEl.value : ''; const full=!!(fulltextEl&&fulltextEl.checked); const v=view();
+    if(v==='hits'){ const idx=(full&&q.trim())? await loadPages(q) : await loadIndex(null,false); const rows=searchHits(idx,q,full); if(seq===state.seq) renderHits(rows,q,full); }
+    else { let cat; try{ cat=await loadView(); }catch(e){ setStatus('Could not load the catalogue view; filtering is unavailable.'); return; } const rows=await searchDocs(cat,q,full); if(seq===state.seq) renderDocs(rows); } }
+  async function init(){ if(tbodyEl && !tbodyEl.querySelector('tr.doc-row')){ try{ paint(await loadView()); }catch(e){ tbodyEl.innerHTML='<tr><td colspan="4">Could not load data.</td></tr>'; return; } }
+    state.ready=true; initLang(); if(qEl) qEl.addEventListener('input', run); if(fulltextEl) fulltextEl.addEventListener('change', run); document.querySelectorAll('input[name="view"]').forEach(r=>r.addEventListener('change', run));
+    if(qEl && qEl.value.trim()) run(); }
   if(document.readyState==='loading') document.addEventListener('DOMContentLoaded', init); else init();
 })(); 
@@ -0,0 +1,98 @@
+// assets/postings.js — client for data/manifest.json (scripts/manifest.py): postings lookup + per-document and per-page text shards
+(function(){
+  'use strict';
+  const BASE='data/', DEFAULT_LANG='en', LANG_KEY='pacm-lang', MAX_PAGES=20, NONLATIN_BUCKETS=16;
+  const TOKEN=/[\p{L}\p{N}]+/gu;
+  let manP=null; const files=new Map();
+
+  // one manifest per language (manifest.json = English, manifest.<lang>.json); only the chosen one is fetched.
+  // The language comes from ?lang=, else the reader's last choice, else English.
+  let lang=(new URLSearchParams(location.search).get('lang')||(()=>{ try{ return localStorage.getItem(LANG_KEY); }catch(e){ return null; } })()||DEFAULT_LANG).toLowerCase();
+  const manifestFile=l=>l===DEFAULT_LANG? 'manifest.json' : `manifest.${l}.json`;
+  function getLang(){ return lang; }
+  function setLang(l){ l=(l||DEFAULT_LANG).toLowerCase(); if(l===lang) return; lang=l; manP=null; try{ localStorage.setItem(LANG_KEY,l); }catch(e){} }
+
+  // only the manifests are revalidated; shard names are content hashes, so the browser may cache them forever
+  function manifest(){ if(!manP) manP=fetch(BASE+manifestFile(lang),{cache:'no-cache'}).then(r=>{ if(!r.ok) throw new Error('HTTP '+r.status); return r.json(); })
+    .catch(e=>{ if(lang===DEFAULT_LANG) throw e; lang=DEFAULT_LANG; manP=null; return manifest(); }); return manP; }
+  function file(path){ if(!files.has(path)) files.set(path, fetch(BASE+path).then(r=>r.ok? r.json() : {}).catch(_=>({}))); return files.get(path); }
+  // same keys as scripts/postings.py shard_key: the folded first two characters (or first one), else one of NONLATIN_BUCKETS hashed shards
+  const fold=s=>s.normalize('NFKD').replace(/\p{M}/gu,'');
+  function shardKey(t){
+    const cs=[...t].slice(0,2), k=[...fold(cs.join(''))].slice(0,2).join('');
+    if(/^[a-z0-9]{1,2}$/.test(k)) return k;
+    if(/^[a-z0-9]/.test(k)) return k[0];
+    return '_'+((cs[0].codePointAt(0)*31+(cs[1]? cs[1].codePointAt(0) : 0))%NONLATIN_BUCKETS).toString(16);
+  }
+  // shards that may hold terms starting with a one-character prefix
+  function prefixKeys(m,tok){ const k=fold(tok).slice(0,1); return Object.keys(m.postings).filter(/^[a-z0-9]$/.test(k)? x=>x.startsWith(k) : x=>x.startsWith('_')); }
+  const tokenize=s=>(s||'').replace(/\u00AD/g,'').replace(/-\s*\n\s*/g,'').toLowerCase().match(TOKEN)||[];
+  // a record and its catalogue aliases (rows pointing at the same PDF) share one text
+  const withAliases=d=>[d].concat(d.aliases||[]);
+  function decode(p){ const ps=[p[1]]; for(let i=2;i<p.length;i++) ps.push(ps[ps.length-1]+p[i]); return ps; }
+
+  // doc id -> positions of tok (or of every term starting with tok, when prefix)
+  async function lookup(tok,prefix){
+    const m=await manifest(); const out=new Map();
+    const keys=(prefix && [...tok].length<2)? prefixKeys(m,tok) : [shardKey(tok)];
+    for(const sh of await Promise.all(keys.filter(k=>m.postings[k]).map(k=>file(m.postings[k])))){
+      const terms=prefix? Object.keys(sh).filter(t=>t.startsWith(tok)) : (sh[tok]? [tok] : []);
+      for(const t of terms) for(const p of sh[t]){ const prev=out.get(p[0]); out.set(p[0], prev? prev.concat(decode(p)) : decode(p)); }
+    }
+    return out;
+  }
+  // doc id -> positions where toks occur consecutively; the last token matches as a prefix
+  async function phrase(toks){
+    const maps=await Promise.all(toks.map((t,i)=>lookup(t,i===toks.length-1))); const out=new Map();
+    for(const [doc,first] of maps[0]){
+      const rest=maps.slice(1).map(m=>m.get(doc)); if(rest.some(x=>!x)) continue;
+      const sets=rest.map(x=>new Set(x));
+      const starts=first.filter(p=>sets.every((s,j)=>s.has(p+j+1))); if(starts.length) out.set(doc,starts);
+    }
+    return out;
+  }
+  // doc id -> start positions of every quoted phrase / bare word, for docs matching all of them; null if the query has no searchable tokens
+  async function locate(raw){
+    const parts=[]; const re=/"([^"]+)"|(\S+)/g; let a; while((a=re.exec(raw||''))) parts.push(a[1]||a[2]);
+    let docs=null;
+    for(const part of parts){ const toks=tokenize(part); if(!toks.length) continue; const d=await phrase(toks);
+      if(!docs) docs=d; else { const both=new Map(); for(const [k,ps] of docs) if(d.has(k)) both.set(k,ps.concat(d.get(k))); docs=both; }
+      if(!docs.size) break; }
+    return docs;
+  }
+  // Set of record urls matching every quoted phrase / bare word; null if the query has no searchable tokens
+  async function match(raw){
+    const m=await manifest(); const docs=await locate(raw);
+    // a translation also matches the catalogue row it translates (row_url)
+    return docs && new Set([...docs.keys()].flatMap(i=>withAliases(m.docs[i]).flatMap(d=>d.row_url? [d.url,d.row_url] : [d.url])));
+  }
+  // page n holds positions ptok[n-1] .. ptok[n]-1 (scripts/manifest.py)
+  function pageOf(ptok,pos){ let lo=0, hi=ptok.length; while(lo<hi){ const mid=(lo+hi)>>1; if(ptok[mid]<=pos) lo=mid+1; else hi=mid; } return Math.max(1,lo); }
+  // text of page n: its own chunk when the build wrote page chunks, else a slice of the document's text shard
+  async function pageText(d,n){
+    if(d.chunks) return (await file(`${d.chunks}.${n}.json`)).text||'';
+    const s=await file(d.file), ps=s.pages||[]; return (s.text||'').slice(ps[n-1]||0, n<ps.length? ps[n] : undefined).trim();
+  }
+  // {url,title,symbol,section,subsection,page,text,lc,norm} per catalogue row and matching page (at most maxPages per document),
+  // text being that page's only; page is null for documents indexed without a page map (text = the whole document).
+  // null if the query has no searchable tokens.
+  async function pages(raw,maxPages){
+    const m=await manifest(); const docs=await locate(raw); if(!docs) return null;
+    const per=await Promise.all([...docs].map(async([i,ps])=>{ const d=m.docs[i];
+      const ns=d.ptok? [...new Set(ps.map(p=>pageOf(d.ptok,p)))].sort((x,y)=>x-y).slice(0,maxPages||MAX_PAGES) : [null];
+      const texts=await Promise.all(ns.map(n=>n? pageText(d,n) : file(d.file).then(s=>s.text||'')));
+      return ns.flatMap((n,k)=>withAliases(d).map(a=>({url:a.url,title:a.title,symbol:a.symbol,section:a.section,subsection:a.subsection,page:n,text:texts[k],lc:'',norm:!!m.normalized}))); }));
+    return per.flat();
+  }
+  // {url,title,symbol,section,subsection,text,lc,norm} for docs in urls (all when null), one per catalogue row; text shards are fetched only if withText.
+  // urls may name a translation by its own url or by its row_url.
+  // norm: text was normalised at build time (no soft hyphens, hyphenated breaks or runs of whitespace)
+  async function records(urls,withText){
+    const m=await manifest(); const hit=a=>urls.has(a.url)||(a.row_url&&urls.has(a.row_url));
+    const docs=m.docs.filter(d=>!urls||withAliases(d).some(hit));
+    const texts=withText? await Promise.all(docs.map(d=>file(d.file))) : [];
+    return docs.flatMap((d,i)=>withAliases(d).filter(a=>!urls||hit(a)).map(a=>({url:a.url,title:a.title,symbol:a.symbol,section:a.section,subsection:a.subsection,text:withText?(texts[i].text||''):'',lc:withText?(texts[i].lc||''):'',norm:!!m.normalized})));
+  }
+
+  window.PACM_postings={ match, manifest, records, pages, tokenize, getLang, setLang };
+})();
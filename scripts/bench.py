@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: scrape parsing, catalogue merge, manual-field
+preservation, PDF extraction, index build and query replay.
+
+Each size in --sizes gets a synthetic corpus (scripts/bench_corpus.py) in a
+scratch directory, then every stage is timed on it:
+  scrape     scrape_current_versions.parse_page over rules.html
+             (--html FILE times a saved copy of the live page instead)
+  merge      merge_meetings.merge_records(catalogue, meetings)
+  preserve   preserve_manual_fields.preserve(old, fresh)
+  extract    every available extractor over the fixture PDFs (--pdfs DIR for real ones)
+  index      manifest.build_manifest (text shards + postings) and search_engine.load
+  search     search_engine.search for every line of the query log (--queries FILE)
+
+Stages are repeated --repeat times and the fastest run is reported (plus the
+median), since the minimum is the least noisy estimate on a shared machine.
+
+Usage:
+  bench.py [--sizes 100,1000,10000] [--stages scrape,merge,...] [--repeat 3]
+           [--html FILE] [--pdfs DIR] [--queries FILE] [--out results.json]
+           [--baseline old.json]
+
+Results are JSON: {commit, python, platform, time, results:[{stage, docs,
+seconds, median, items, per_s, ...}]}. --out writes them to a file (stdout
+otherwise); --baseline prints each stage's change against an earlier results file.
+"""
+import json, sys, time, shutil, pathlib, platform, argparse, statistics, subprocess, tempfile
+import bench_corpus
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+STAGES = ("scrape", "merge", "preserve", "extract", "index", "search")
+
+def timed(fn, repeat: int):
+    """(fastest seconds, median seconds, last result) over repeat calls of fn()."""
+    runs, out = [], None
+    for _ in range(max(1, repeat)):
+        t = time.perf_counter()
+        out = fn()
+        runs.append(time.perf_counter() - t)
+    return min(runs), statistics.median(runs), out
+
+def result(stage: str, docs: int, runs, items: int, **extra) -> dict:
+    best, median, _ = runs
+    return {"stage": stage, "docs": docs, "seconds": round(best, 6), "median": round(median, 6),
+            "items": items, "per_s": round(items / best, 2) if best else None, **extra}
+
+def bench_scrape(paths, docs, args):
+    from scrape_current_versions import parse_page
+    html = (args.html or paths["html"]).read_text(encoding="utf-8")
+    runs = timed(lambda: parse_page(html), args.repeat)
+    return [result("scrape", docs, runs, len(runs[2]), html_bytes=len(html.encode("utf-8")),
+                   source="saved" if args.html else "synthetic")]
+
+def bench_merge(paths, docs, args):
+    from merge_meetings import merge_records
+    cat = json.loads(paths["catalogue"].read_text(encoding="utf-8"))
+    meet = json.loads(paths["meetings"].read_text(encoding="utf-8"))
+    runs = timed(lambda: merge_records([dict(r) for r in cat], meet), args.repeat)
+    return [result("merge", docs, runs, len(cat) + len(meet), rows_out=len(runs[2]))]
+
+def bench_preserve(paths, docs, args):
+    from preserve_manual_fields import preserve
+    old = json.loads(paths["catalogue"].read_text(encoding="utf-8"))
+    # a fresh scrape: same documents, manual fields blanked, order reversed
+    fresh = [{**r, "notes": "", "subsection": ""} for r in reversed(old)]
+    runs = timed(lambda: preserve(old, [dict(r) for r in fresh]), args.repeat)
+    return [result("preserve", docs, runs, len(fresh))]
+
+def bench_extract(paths, docs, args):
+    import extractors, extract_bench
+    pdfs = sorted((args.pdfs or paths["pdfs"]).glob("*.pdf"))
+    out = []
+    for name, ext in extractors.EXTRACTORS.items():
+        if name == "ocr" or not ext.available():
+            continue  # OCR is orders of magnitude slower; time it with extract_bench.py --extractors ocr
+        runs = timed(lambda: extract_bench.run_extractor(name, pdfs, 1), args.repeat)
+        r = runs[2]
+        out.append(result(f"extract:{name}", docs, runs, r["pages"], pdfs=len(pdfs), mb=r["mb"],
+                          pages_per_s=r["pages_per_s"], mb_per_s=r["mb_per_s"]))
+    return out
+
+def bench_index(paths, docs, args):
+    import manifest, search_engine
+    work = paths["index"].parent / "site"
+    def build():
+        shutil.rmtree(work, ignore_errors=True)
+        return manifest.build_manifest(paths["index"], work)
+    runs = timed(build, args.repeat)
+    out = [result("index:manifest", docs, runs, len(runs[2]["docs"]), postings_shards=len(runs[2]["postings"]))]
+    def load():
+        idx = search_engine.load(paths["index"])
+        idx["corpus"].close()
+        return idx
+    runs = timed(load, args.repeat)
+    out.append(result("index:load", docs, runs, len(runs[2]["docs"]), terms=len(runs[2]["terms"])))
+    return out
+
+def bench_search(paths, docs, args):
+    import search_engine
+    queries = [q.strip() for q in (args.queries or paths["queries"]).read_text(encoding="utf-8").splitlines() if q.strip()]
+    idx = search_engine.load(paths["index"])
+    try:
+        lat = []
+        def replay():
+            lat.clear()
+            for q in queries:
+                t = time.perf_counter()
+                search_engine.search(idx, q, 10)
+                lat.append(time.perf_counter() - t)
+            return list(lat)
+        runs = timed(replay, args.repeat)
+    finally:
+        idx["corpus"].close()
+    ms = sorted(x * 1000 for x in runs[2])
+    pct = lambda p: round(ms[min(len(ms) - 1, int(p * len(ms)))], 3)
+    return [result("search", docs, runs, len(queries), p50_ms=pct(0.5), p95_ms=pct(0.95), max_ms=round(ms[-1], 3))]
+
+BENCHES = {"scrape": bench_scrape, "merge": bench_merge, "preserve": bench_preserve,
+           "extract": bench_extract, "index": bench_index, "search": bench_search}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout.decode().strip()
+    except Exception:
+        return ""
+
+def compare(results: list, baseline: dict):
+    old = {(r["stage"], r["docs"]): r for r in baseline.get("results", [])}
+    print(f"{'stage':<18} {'docs':>6} {'seconds':>10} {'baseline':>10} {'change':>8}", file=sys.stderr)
+    for r in results:
+        b = old.get((r["stage"], r["docs"]))
+        change = f"{(r['seconds'] / b['seconds'] - 1) * 100:+.1f}%" if b and b["seconds"] else "new"
+        print(f"{r['stage']:<18} {r['docs']:>6} {r['seconds']:>10.4f} "
+              f"{(b['seconds'] if b else float('nan')):>10.4f} {change:>8}", file=sys.stderr)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Offline benchmarks for the PACM pipeline.")
+    ap.add_argument("--sizes", default="100,1000", help="comma-separated synthetic corpus sizes (up to 10000)")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--pdf-count", type=int, default=20, help="synthetic fixture PDFs per corpus")
+    ap.add_argument("--html", type=pathlib.Path, help="saved rules-and-regulations page to parse instead")
+    ap.add_argument("--pdfs", type=pathlib.Path, help="directory of fixture PDFs to extract instead")
+    ap.add_argument("--queries", type=pathlib.Path, help="query log (one query per line) to replay instead")
+    ap.add_argument("--out", type=pathlib.Path, help="write results JSON here instead of stdout")
+    ap.add_argument("--baseline", type=pathlib.Path, help="earlier results JSON to compare against")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in BENCHES]
+    if unknown:
+        print(f"ERROR: unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(2)
+
+    results = []
+    for docs in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"pacm-bench-{docs}-") as tmp:
+            t = time.perf_counter()
+            paths = bench_corpus.write(pathlib.Path(tmp), docs, args.pdf_count)
+            print(f"[bench] {docs} docs: corpus generated in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+            for stage in stages:
+                for r in BENCHES[stage](paths, docs, args):
+                    print(f"[bench] {docs:>6} {r['stage']:<16} {r['seconds']:.4f}s ({r['per_s']}/s)", file=sys.stderr)
+                    results.append(r)
+
+    report = {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "repeat": args.repeat, "results": results}
+    if args.baseline:
+        compare(results, json.loads(args.baseline.read_text(encoding="utf-8")))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Synthetic, deterministic corpus for scripts/bench.py.
+
+Scales the real catalogue's shape (sections, subsections, symbol patterns,
+CMA link lists, meeting reports) to any number of documents, so every stage can
+be timed at 100, 1k or 10k documents without touching the network:
+
+  catalogue(n)          rows shaped like data/a64_catalogue.json
+  meetings(n)           rows shaped like data/meetings.json (half overlap the catalogue)
+  rules_html(rows)      the rules-and-regulations page: h2/h3 headings, one table per
+                        subsection, CMA decisions as link lists
+  doc_text(i)           document text drawn from a Zipf-like vocabulary
+  search_index(rows)    data/search_index.json records (normalised text, paras)
+  query_log(n)          words, phrases and prefix queries over the same vocabulary
+  pdf_bytes(pages)      a minimal text PDF (Helvetica, one text object per page)
+
+Usage: bench_corpus.py OUTDIR [--docs 1000] [--pdfs 20] [--seed 0]
+writes a64_catalogue.json, meetings.json, rules.html, search_index.json,
+queries.txt and pdfs/*.pdf into OUTDIR.
+"""
+import json, random, pathlib, argparse
+from build_fulltext import normalize_text, make_record, extract_settings
+
+BASE = "https://unfccc.int"
+RESOURCE = BASE + "/sites/default/files/resource"
+
+SECTIONS = {
+    "Standards": ("STAN", ("Methodology", "Activity cycle", "Accreditation")),
+    "Procedures": ("PROC", ("Governance", "Activity cycle", "Accreditation", "Registry")),
+    "Tools": ("TOOL", ("Activity cycle",)),
+    "Information notes": ("INFO", ("Governance", "Methodology", "Regulatory", "Other")),
+}
+AREAS = {"Methodology": "METH", "Activity cycle": "AC", "Accreditation": "ACCR", "Registry": "REGS",
+         "Governance": "GOV", "Regulatory": "REGS", "Other": "GOV"}
+CMA_SECTION = "CMA related decisions and documents"
+
+WORDS = ("baseline emission removal reversal methodology activity host party supervisory body mechanism "
+         "registry accreditation validation verification monitoring crediting period additionality leakage "
+         "standard procedure tool guidance decision report annual addendum article paragraph participant "
+         "authorization transition afforestation reforestation sustainable development safeguard benchmark "
+         "ambition adjustment uncertainty sampling stakeholder consultation appeal grievance designated "
+         "operational entity issuance cancellation share proceeds adaptation fund mitigation contribution").split()
+
+def vocabulary(size: int = 5000, seed: int = 0) -> list:
+    """WORDS followed by pseudo-words, most frequent first."""
+    rnd = random.Random(seed)
+    vocab = list(WORDS)
+    syllables = ("ba", "co", "de", "fi", "ga", "lo", "mi", "no", "pa", "re", "si", "ta", "ve", "xu")
+    while len(vocab) < size:
+        vocab.append("".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4))))
+    return vocab
+
+def zipf_weights(n: int) -> list:
+    return [1.0 / (k + 1) for k in range(n)]
+
+def catalogue(n: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    rows = []
+    sections = list(SECTIONS)
+    for i in range(n):
+        if i % 10 == 9:
+            rows.append({
+                "title": f"Decision {i // 10 % 9 + 1}/CMA.{i // 90 % 6 + 1}", "url": f"{RESOURCE}/cma{2021 + i % 4}_{i:05d}E.pdf#page={i % 40 + 1}",
+                "symbol": f"{i // 10 % 9 + 1}/CMA.{i // 90 % 6 + 1}", "version": "", "date": str(2021 + i % 4),
+                "section": CMA_SECTION, "subsection": "CMA guidance on Article 6.4", "notes": "", "type": "CMA decision",
+            })
+            continue
+        sec = sections[i % len(sections)]
+        code, subs = SECTIONS[sec]
+        sub = subs[rnd.randrange(len(subs))]
+        symbol = f"A6.4-{code}-{AREAS[sub]}-{i:03d}"
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 8))).capitalize()
+        rows.append({
+            "title": title, "url": f"{RESOURCE}/{symbol}.pdf", "symbol": symbol,
+            "version": f"{rnd.randint(1, 5)}.{rnd.randint(0, 3)}", "date": f"{rnd.randint(1, 28)} Mar. {2022 + i % 4}",
+            "section": sec, "subsection": sub, "notes": "", "type": sec.rstrip("s"),
+        })
+    return rows
+
+def meetings(n: int, seed: int = 0) -> list:
+    """Meeting reports; every other one already exists in a catalogue built with the same n."""
+    out = []
+    for i in range(n):
+        sym = f"A6.4-SBM{i:03d}"
+        out.append({"title": f"{sym} — Meeting report", "url": f"{RESOURCE}/{sym}.pdf", "symbol": sym,
+                    "date": "", "section": "Meeting reports of the Supervisory Body", "notes": ""})
+    return out
+
+def with_meetings(rows: list, meeting_rows: list) -> list:
+    """rows plus every other meeting report (with a note and a stale subsection), as merge_meetings sees them."""
+    extra = [{**m, "subsection": "Other", "notes": "manual note"} for m in meeting_rows[::2]]
+    return rows + extra
+
+def rules_html(rows: list) -> str:
+    """The rules-and-regulations page as scrape_current_versions.parse_page expects it."""
+    esc = lambda s: s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    groups = {}
+    for r in rows:
+        if r.get("section") in SECTIONS or r.get("section") == CMA_SECTION:
+            groups.setdefault(r["section"], {}).setdefault(r.get("subsection", ""), []).append(r)
+    out = ["<html><body><h1>Rules and regulations</h1>"]
+    for sec, subs in groups.items():
+        out.append(f"<h2>{esc(sec)}</h2>")
+        for sub, items in subs.items():
+            out.append(f"<h3>{esc(sub)}</h3>")
+            if sec == CMA_SECTION:
+                out.append("<ul>" + "".join(
+                    f'<li><a href="{esc(r["url"])}">{esc(r["title"])}</a></li>' for r in items) + "</ul>")
+                continue
+            out.append("<table><tr><th>Title</th><th>Symbol</th><th>Current version</th><th>Entry into force</th></tr>")
+            for r in items:
+                out.append(f"<tr><td>{esc(r['title'])}</td><td>{esc(r['symbol'])}</td>"
+                           f"<td><a href=\"{esc(r['url'])}\">English</a> <a href=\"{esc(r['url'][:-4])}_fr.pdf\">French</a></td>"
+                           f"<td>{esc(r['date'])}</td></tr>")
+            out.append("</table>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+def doc_text(i: int, vocab: list, words: int = 2000) -> str:
+    rnd = random.Random(i)
+    toks = rnd.choices(vocab, weights=zipf_weights(len(vocab)), k=words)
+    paras = [" ".join(toks[k:k + 80]) + "." for k in range(0, len(toks), 80)]
+    return "\n\n".join(paras)
+
+def search_index(rows: list, vocab: list, words: int = 2000) -> list:
+    return [make_record([r], {"extract": extract_settings("pdftotext"), **normalize_text(doc_text(i, vocab, words))},
+                        f"{i:064x}")
+            for i, r in enumerate(rows)]
+
+def query_log(n: int, vocab: list, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    weights = zipf_weights(len(vocab))
+    out = []
+    for k in range(n):
+        a, b = rnd.choices(vocab[:500], weights=weights[:500], k=2)
+        kind = k % 4
+        out.append(a if kind == 0 else f"{a} {b}" if kind == 1 else f'"{a} {b}"' if kind == 2 else a[:4] + "*")
+    return out
+
+def pdf_bytes(pages: list) -> bytes:
+    """Minimal PDF with one page per string; lines are split on newlines."""
+    lit = lambda s: s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        pid = len(objs) + 1
+        kids.append(f"{pid} 0 R")
+        body = b"".join(b"(" + lit(line) + b") Tj 0 -14 Td " for line in text.split("\n"))
+        stream = b"BT /F1 10 Tf 40 760 Td " + body + b"ET"
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode())
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    out, offsets = b"%PDF-1.4\n", []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1) + b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return out
+
+def pdf_pages(i: int, vocab: list, pages: int = 4) -> list:
+    """Page texts for fixture PDF i, wrapped at ~12 words a line, 50 lines a page."""
+    toks = doc_text(i, vocab, pages * 600).split()
+    lines = [" ".join(toks[k:k + 12]) for k in range(0, len(toks), 12)]
+    return ["\n".join(lines[k:k + 50]) for k in range(0, len(lines), 50)]
+
+def write(outdir: pathlib.Path, docs: int, pdfs: int = 20, seed: int = 0) -> dict:
+    outdir.mkdir(parents=True, exist_ok=True)
+    vocab = vocabulary(seed=seed)
+    rows = catalogue(docs, seed)
+    meet = meetings(max(2, docs // 20), seed)
+    paths = {
+        "catalogue": outdir / "a64_catalogue.json", "meetings": outdir / "meetings.json",
+        "html": outdir / "rules.html", "index": outdir / "search_index.json",
+        "queries": outdir / "queries.txt", "pdfs": outdir / "pdfs",
+    }
+    paths["catalogue"].write_text(json.dumps(with_meetings(rows, meet), ensure_ascii=False, indent=2), encoding="utf-8")
+    paths["meetings"].write_text(json.dumps(meet, ensure_ascii=False, indent=2), encoding="utf-8")
+    paths["html"].write_text(rules_html(rows), encoding="utf-8")
+    with open(paths["index"], "w", encoding="utf-8") as f:
+        recs = search_index(rows, vocab)
+        f.write("[\n" + ",\n".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in recs) + "\n]\n")
+    paths["queries"].write_text("\n".join(query_log(200, vocab, seed)) + "\n", encoding="utf-8")
+    paths["pdfs"].mkdir(exist_ok=True)
+    for i in range(pdfs):
+        (paths["pdfs"] / f"doc{i:03d}.pdf").write_bytes(pdf_bytes(pdf_pages(i, vocab)))
+    return paths
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Write a synthetic PACM corpus for benchmarking.")
+    ap.add_argument("outdir", type=pathlib.Path)
+    ap.add_argument("--docs", type=int, default=1000)
+    ap.add_argument("--pdfs", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = write(args.outdir, args.docs, args.pdfs, args.seed)
+    print(f"Wrote a {args.docs}-document corpus to {args.outdir} ({', '.join(p.name for p in paths.values())})")
+
+if __name__ == "__main__":
+    main()
@@ -3,112 +3,639 @@
 Builds a full-text search index for the PACM site, with OCR fallback.
 
 Reads:  data/a64_catalogue.json        (list of documents with url, title, symbol, section, subsection)
-Writes: data/search_index.json         (array of {url,title,symbol,section,subsection,text})
+Writes: data/search_index.json         (array of {url,title,symbol,section,subsection[,aliases],sha256,extract,paras,pages,text[,lc]})
+        data/manifest.json, data/text/, data/postings/
+                                       (content-hashed site shards, see scripts/manifest.py)
+        data/search_index.corpus       (mmap-able binary corpus for Python tools, see scripts/corpus_store.py)
 
-Baseline: use pdftotext.
-If pdftotext returns little/no text, try OCR using ocrmypdf (Tesseract) then pdftotext again.
+Catalogue rows are grouped by canonical URL (http_cache.canonical_url: no
+fragment, normalised query), so a PDF listed several times, e.g. one Add.1 split
+into "#5CMA6" and "#6CMA6" rows, is downloaded and extracted once. Its record
+carries the first row's url/title/symbol/section/subsection and lists the other
+rows as "aliases" ([{url,title,symbol,section,subsection}]); the text is stored
+once and every alias shares it.
+
+Text comes from the extractors in scripts/extractors.py, chosen per run with
+--extractor (default "auto": pdftotext, falling back to pdfminer when pdftotext
+is missing or returns nothing) or per document with an "extractor" field on its
+catalogue row. Pages whose text layer has fewer than MIN_PAGE_CHARS characters
+are OCR'd with Tesseract, in parallel and cached per page in .cache/ocr/.
+pdfminer splits long documents into page ranges on a process pool
+(--extractor pdfminer-fast also simplifies its layout analysis).
+scripts/extract_bench.py compares the extractors' speed and agreement.
+
+Languages: a catalogue row's url is its English version; other language versions
+listed in its "languages" ({"fr": url, ...}, from scrape_current_versions.py) are
+indexed as documents of their own with "lang" and the English row's url as
+"row_url", OCR'd with that language's Tesseract data (extractors.OCR_LANGS), and
+published in one manifest per language (data/manifest.<lang>.json, see
+scripts/manifest.py) so the site loads only the language being searched.
+--lang CODE (repeatable) limits a targeted rebuild to those languages.
+
+Text is normalised at build time: soft hyphens dropped, hyphenated line breaks
+joined, whitespace collapsed to single spaces. "paras" holds the start offset of
+every paragraph (blank-line or page separated) in the normalised text and
+"pages" the start offset of every page (pages[n-1] for page n; an empty page
+starts where the next one does), so a hit at offset i is on page
+bisect_right(pages, i). --page-chunks also writes every page as its own text
+shard (see scripts/manifest.py) for page-scoped snippets and #page=N links.
+--lowercase-field also stores a lowercased copy as "lc" for the client.
+Output JSON is compact (no indentation).
+
+Usage: build_fulltext.py [--jobs N] [--extractor auto|pdftotext|pdfminer|pdfminer-fast|ocr] [--report PATH] [--profile DIR]
+                         [--only-missing] [--only-stale] [--symbol SYM] [--section NAME] [--since DATE] [--lang CODE]
+                         [--urls FILE] [--page-chunks]
+With --jobs N > 1, downloads run on a bounded thread pool while a pool of N
+processes runs pdftotext/OCR; each document gets its own scratch directory and
+records are still written in catalogue order.
+
+Downloads go through scripts/http_cache.py (conditional requests, on-disk cache);
+pass --offline to build only from cached PDFs. PDFs are streamed to disk, never
+held in memory, and refused without retrying when they are larger than
+PACM_MAX_DOWNLOAD_MB (default 200) or turn out not to be PDFs (an HTML error
+page, a body without the %PDF header). Extracted text is capped at
+PACM_MAX_TEXT_CHARS characters per document (default 20 million; pdftotext's
+output is read from a pipe and stopped there); a cut record's "extract" ends in
+";max-chars=N", so raising the cap re-extracts it (lowering it applies to
+complete records on the next --full). Peak memory per worker thus stays bounded
+whatever the corpus holds.
+
+Incremental by default: every record stores the SHA-256 of its source PDF and the
+extractor settings ("extract"). When both match the previous search_index.json,
+the old text is reused and extraction is skipped. --full re-extracts everything.
+
+Targeted rebuilds: --only-missing, --only-stale, --symbol SYM (globs allowed),
+--section NAME, --since YYYY-MM-DD and --urls FILE select a subset of the catalogue's
+documents; only those are fetched and extracted (or reused), every other record
+of the existing index is copied as it is, and a selected document that fails
+keeps its old record. scripts/coverage.py lists which documents are missing or
+stale and why; scripts/version_history.py --changed lists the documents that
+have a new version for --urls. Records whose URL is no longer in the catalogue
+are dropped by every build.
+
+Each finished record is appended to data/search_index.journal.jsonl as soon as it
+is ready. If a run is interrupted, the next run with the same catalogue,
+extractor settings, --lowercase-field and --page-chunks resumes from the journal;
+any other run starts a new one. search_index.json is then assembled from the
+journal in one streaming pass (one record per line) and the journal is removed,
+so memory stays flat regardless of corpus size.
+
+Every run also writes data/build_report.json (--report PATH, see
+scripts/build_report.py): per-document fetch latency, bytes and retries, time and
+characters per extractor tried, whether OCR ran and for how long, and the reason
+for every document that produced no record, plus per-stage timings and the
+slowest documents and stages, which are also printed at the end. --profile DIR
+runs each stage under cProfile and writes DIR/<stage>.prof.
 
 Requirements on runner:
-- poppler-utils (pdftotext)
-- ocrmypdf (which pulls tesseract-ocr)
+- requests
+- poppler-utils (pdftotext, pdftoppm, pdfinfo)
+- tesseract-ocr (plus language data for PACM_OCR_LANG)
+- pdfminer.six (optional, for --extractor pdfminer and the auto fallback)
 """
-import json, os, sys, subprocess, tempfile, urllib.request, pathlib, time, shutil
+import json, os, re, sys, tempfile, pathlib, time, shutil, argparse, hashlib, fnmatch, datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import http_cache, manifest, corpus_store, extractors, build_report
+from catalogue import normalize_symbol, parse_day
+from extractors import OCR_WORKERS
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 DATA = ROOT / 'data'
 CATALOG = DATA / 'a64_catalogue.json'
 OUT = DATA / 'search_index.json'
+JOURNAL = DATA / 'search_index.journal.jsonl'
+REPORT = DATA / 'build_report.json'
 
 TIMEOUT_FETCH = 90
-MIN_TEXT_CHARS = 200
-OCR_LANG = os.environ.get("PACM_OCR_LANG", "eng")
+FETCH_WORKERS = 4
+# Bump EXTRACTOR_VERSION whenever extraction output changes, so incremental runs re-extract.
+EXTRACTOR_VERSION = 4
+EXTRACTOR = os.environ.get("PACM_EXTRACTOR", "auto")
+LOWERCASE_FIELD = False
+
+PARA_SPLIT_RE = re.compile(r"\n[ \t]*\n|\f")
+DEHYPHEN_RE = re.compile(r"-\s*\n\s*")
+WS_RE = re.compile(r"\s+")
+
+META_KEYS = ("url", "title", "symbol", "section", "subsection")
+LANG_KEYS = ("lang", "row_url")
 
 def is_pdf_url(u: str) -> bool:
-    return u.lower().split('?')[0].endswith('.pdf')
+    return http_cache.canonical_url(u).lower().split('?')[0].endswith('.pdf')
 
-def fetch(url: str, dest: pathlib.Path, retries=3):
-    for i in range(retries):
-        try:
-            with urllib.request.urlopen(url, timeout=TIMEOUT_FETCH) as r:
-                dest.write_bytes(r.read())
-            return True
-        except Exception as e:
-            time.sleep(2*(i+1))
-    return False
+def document_rows(docs: list) -> list:
+    """The catalogue rows, each followed by one row per other-language version in its "languages"
+    ({code: url}): the same fields with that version's url, "lang" and the catalogue row's url as "row_url"."""
+    out = []
+    for d in docs:
+        out.append(d)
+        for lang, url in (d.get("languages") or {}).items():
+            if lang != "en" and url:
+                row = {k: v for k, v in d.items() if k != "languages"}
+                row.update(url=url, lang=lang, row_url=d.get("url", ""))
+                out.append(row)
+    return out
+
+def doc_lang(rows: list) -> str:
+    return rows[0].get("lang") or "en"
 
-def have_cmd(cmd: str) -> bool:
-    return shutil.which(cmd) is not None
+def group_by_document(docs: list) -> list:
+    """[(first index in document_rows(docs), canonical url, [rows])] for every distinct PDF, in catalogue order."""
+    groups = {}
+    for i, d in enumerate(document_rows(docs)):
+        if d.get("url") and is_pdf_url(d["url"]):
+            groups.setdefault(http_cache.canonical_url(d["url"]), (i, []))[1].append(d)
+    return [(i, url, rows) for url, (i, rows) in groups.items()]
 
-def run_pdftotext(pdf_path: pathlib.Path, txt_path: pathlib.Path) -> str:
+def fetch(url: str, dest: pathlib.Path, retries=3, stats: dict = None):
+    """Download url to dest with retries; stats gets fetch_s, bytes, retries and the last error.
+    The body is streamed to disk and refused, without retrying, when it is over http_cache.MAX_BYTES or not a PDF."""
+    stats = {} if stats is None else stats
+    t = time.perf_counter()
+    stats["error"] = None
     try:
-        subprocess.run(
-            ["pdftotext", "-layout", "-nopgbrk", str(pdf_path), str(txt_path)],
-            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        return txt_path.read_text(errors="ignore")
-    except Exception:
-        return ""
-
-def run_ocr(input_pdf: pathlib.Path, output_pdf: pathlib.Path) -> bool:
-    if not have_cmd("ocrmypdf"):
+        for i in range(retries):
+            stats["retries"] = i
+            try:
+                http_cache.download(url, dest, timeout=TIMEOUT_FETCH, max_bytes=http_cache.MAX_BYTES, expect="pdf")
+                stats["bytes"] = dest.stat().st_size
+                stats["error"] = None
+                return True
+            except http_cache.CacheMiss:
+                stats["error"] = "offline: not in the HTTP cache"
+                return False
+            except http_cache.Rejected as e:
+                stats["error"] = f"rejected: {e}"
+                return False
+            except Exception as e:
+                stats["error"] = f"fetch: {type(e).__name__}: {e}"
+                if i + 1 < retries:
+                    time.sleep(2*(i+1))
         return False
+    finally:
+        stats["fetch_s"] = round(time.perf_counter() - t, 4)
+
+def ocr_lang(lang: str) -> str:
+    """Tesseract language for a catalogue language code (unknown codes OCR as PACM_OCR_LANG)."""
+    return extractors.OCR_LANGS.get(lang, extractors.OCR_LANG)
+
+def extract_settings(name: str, lang: str = "en", truncated: bool = False) -> str:
+    """Value of a record's "extract" field for text produced by extractor name from a document in lang;
+    text cut at the character cap says so, so raising extractors.MAX_TEXT_CHARS re-extracts it."""
+    cap = f";max-chars={extractors.MAX_TEXT_CHARS}" if truncated else ""
+    return f"v{EXTRACTOR_VERSION};{extractors.settings(name, ocr_lang(lang))};norm{cap}"
+
+def accepted_settings(chain: tuple, lang: str = "en") -> set:
+    """The "extract" values a document extracted with chain may carry and still be up to date."""
+    return {extract_settings(name, lang, cut) for name in chain for cut in (False, True)}
+
+def chain_for(rows: list) -> tuple:
+    """Extractor chain for one document: its catalogue "extractor" field, else the run's --extractor."""
+    return extractors.CHAINS.get(rows[0].get("extractor") or EXTRACTOR, extractors.CHAINS[EXTRACTOR])
+
+def sha256_file(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def iter_index(path: pathlib.Path):
+    """(offset of the record's line, or None for a pretty-printed index, record) for every record in path."""
+    with open(path, "rb") as f:
+        off = 0
+        for line in f:
+            body = line.strip().rstrip(b",")
+            if body.startswith(b"{"):
+                try:
+                    r = json.loads(body)
+                except ValueError:
+                    break  # pretty-printed (pre-journal) index: fall back below
+                yield off, r
+            off += len(line)
+        else:
+            return
+    for r in json.loads(path.read_text()):
+        yield None, r
+
+def record_meta(rec: dict) -> dict:
+    """The catalogue-derived part of a record: META_KEYS, lang/row_url and aliases."""
+    meta = {k: rec.get(k, "") for k in META_KEYS}
+    meta.update((k, rec[k]) for k in LANG_KEYS if rec.get(k))
+    if rec.get("aliases"):
+        meta["aliases"] = rec["aliases"]
+    return meta
+
+def load_previous(path: pathlib.Path) -> dict:
+    """canonical url -> {sha256, extract, meta, path, offset} for the records of an earlier build;
+    text is read lazily (previous_record). Records of a pretty-printed index are kept whole."""
+    if not path.exists():
+        return {}
+    prev = {}
     try:
-        subprocess.run(
-            ["ocrmypdf", "--force-ocr", "--language", OCR_LANG, "--optimize", "1",
-             "--jobs", "2", "--quiet", str(input_pdf), str(output_pdf)],
-            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        return output_pdf.exists() and output_pdf.stat().st_size > 0
-    except Exception:
-        return False
+        for off, r in iter_index(path):
+            if not r.get("url"):
+                continue
+            info = {"sha256": r.get("sha256"), "extract": r.get("extract"), "meta": record_meta(r)}
+            info.update({"path": path, "offset": off} if off is not None else {"record": r})
+            prev[http_cache.canonical_url(r["url"])] = info
+    except ValueError:
+        return {}
+    return prev
 
-def index_pdf(url: str, meta: dict, tmpdir: pathlib.Path):
-    pdf_path = tmpdir / "doc.pdf"
-    txt_path = tmpdir / "doc.txt"
-    ok = fetch(url, pdf_path)
-    if not ok:
+def previous_record(prev: dict, url: str) -> dict:
+    info = prev[url]
+    if "record" in info:
+        return info["record"]
+    with open(info["path"], "rb") as f:
+        f.seek(info["offset"])
+        return json.loads(f.readline().strip().rstrip(b","))
+
+def reusable_body(prev: dict, url: str, digest: str, chain: tuple, lang: str = "en"):
+    """{extract, paras, pages, text} of the previous record for (canonical) url if its PDF is unchanged
+    and it came from an extractor in chain, else None."""
+    info = prev.get(url)
+    if not info or not info["sha256"] or info["sha256"] != digest:
+        return None
+    if info["extract"] not in accepted_settings(chain, lang):
         return None
+    rec = previous_record(prev, url)
+    return {"extract": rec["extract"], "paras": rec.get("paras", []), "pages": rec.get("pages", []), "text": rec["text"]}
+
+def doc_status(url: str, rows: list, prev: dict):
+    """("indexed" | "missing" | "stale", reason) of one document against an earlier build. Stale means a
+    rebuild from the same PDF would change the record: its catalogue fields or the extractor settings differ."""
+    info = prev.get(url)
+    if info is None:
+        return "missing", "no record"
+    if info["meta"] != record_meta(make_record(rows, {"extract": "", "paras": [], "pages": [], "text": ""}, "")):
+        return "stale", "catalogue fields changed"
+    if not info["sha256"]:
+        return "stale", "record predates incremental builds (no sha256)"
+    if info["extract"] not in accepted_settings(chain_for(rows), doc_lang(rows)):
+        return "stale", f"extracted with other settings ({info['extract'] or 'unknown'})"
+    return "indexed", ""
 
-    text = run_pdftotext(pdf_path, txt_path)
-    if len(text.strip()) < MIN_TEXT_CHARS and have_cmd("ocrmypdf"):
-        ocr_pdf = tmpdir / "doc_ocr.pdf"
-        if run_ocr(pdf_path, ocr_pdf):
-            text = run_pdftotext(ocr_pdf, txt_path)
+def row_date(row: dict):
+    """Catalogue date ("31 Mar. 2024", "22 Aug 2025", "2024") as a datetime.date, or None."""
+    s = (row.get("date") or "").strip()
+    day = parse_day(s)
+    if day is None and re.fullmatch(r"\d{4}", s) and int(s) > 0:
+        day = datetime.date(int(s), 1, 1)
+    return day
 
-    if not text.strip():
+def select_items(items: list, args, prev: dict):
+    """The documents a targeted rebuild should process, or None when no selection flag is set.
+    Flags combine with AND; repeated --symbol/--section values combine with OR."""
+    if not (args.only_missing or args.only_stale or args.symbol or args.section or args.since or args.lang
+            or args.urls is not None):
         return None
+    symbols = [normalize_symbol(s) for s in args.symbol or []]
+    sections = {s.strip().casefold() for s in args.section or []}
+    out = []
+    for it in items:
+        i, url, rows = it
+        status = doc_status(url, rows, prev)[0]
+        if args.only_missing and args.only_stale:
+            if status == "indexed":
+                continue
+        elif args.only_missing and status != "missing" or args.only_stale and status != "stale":
+            continue
+        if symbols and not any(fnmatch.fnmatchcase(normalize_symbol(r.get("symbol") or ""), pat)
+                               for r in rows for pat in symbols):
+            continue
+        if sections and not any((r.get("section") or "").strip().casefold() in sections for r in rows):
+            continue
+        if args.lang and doc_lang(rows) not in args.lang:
+            continue
+        if args.since and not any((row_date(r) or datetime.date.min) >= args.since for r in rows):
+            continue
+        if args.urls is not None and url not in args.urls:
+            continue
+        out.append(it)
+    return out
+
+def read_urls(path: str) -> set:
+    """Canonical URLs listed one per line in a file (version_history.py --changed); blank lines and #comments skipped."""
+    lines = pathlib.Path(path).read_text(encoding="utf-8").splitlines()
+    return {http_cache.canonical_url(u.strip()) for u in lines if u.strip() and not u.lstrip().startswith("#")}
+
+def open_journal(path: pathlib.Path, header: dict):
+    """Open the append-only journal; returns (file, {item index: offset}) of entries kept from an interrupted run."""
+    done = {}
+    if path.exists():
+        with open(path, "rb") as f:
+            try:
+                same = json.loads(f.readline()) == header
+            except ValueError:
+                same = False
+            if same:
+                off = f.tell()
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final write
+                    try:
+                        done[json.loads(line)["i"]] = off
+                    except (ValueError, KeyError):
+                        break
+                    off += len(line)
+        if same:
+            fh = open(path, "r+b")
+            fh.seek(off)
+            fh.truncate()
+            return fh, done
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "wb")
+    fh.write((json.dumps(header) + "\n").encode("utf-8"))
+    fh.flush()
+    return fh, done
+
+def journal_append(fh, i: int, rec: dict, sync: bool = True) -> int:
+    off = fh.tell()
+    fh.write((json.dumps({"i": i, "record": rec}, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+    if sync:
+        fh.flush()
+        os.fsync(fh.fileno())
+    return off
+
+def assemble_index(journal: pathlib.Path, offsets, out: pathlib.Path):
+    """Stream journal entries (in the given order) into out as a JSON array, one record per line."""
+    tmp = out.with_name(out.name + ".tmp")
+    n = 0
+    with open(journal, "rb") as src, open(tmp, "w", encoding="utf-8") as dst:
+        dst.write("[")
+        for off in offsets:
+            src.seek(off)
+            rec = json.loads(src.readline())["record"]
+            dst.write(("," if n else "") + "\n" + json.dumps(rec, ensure_ascii=False, separators=(",", ":")))
+            n += 1
+        dst.write("\n]\n")
+    os.replace(tmp, out)
+    return n
+
+def normalize_text(raw: str) -> dict:
+    """Dehyphenate, drop soft hyphens and collapse whitespace; returns {paras, pages, text}.
+    raw has its pages separated by form feeds."""
+    parts, paras, pages, n = [], [], [], 0
+    for page in raw.replace("\u00ad", "").split("\f"):
+        pages.append(n + 1 if parts else 0)
+        for para in PARA_SPLIT_RE.split(page):
+            para = WS_RE.sub(" ", DEHYPHEN_RE.sub("", para)).strip()
+            if not para:
+                continue
+            if parts:
+                n += 1  # joining space
+            paras.append(n)
+            parts.append(para)
+            n += len(para)
+    return {"paras": paras, "pages": [min(p, n) for p in pages], "text": " ".join(parts)}
+
+def extract_body(pdf_path: pathlib.Path, digest: str, chain: tuple, ocr_workers: int = OCR_WORKERS,
+                 lang: str = "en") -> dict:
+    """{extract, paras, pages, text, metrics}; scratch files live next to pdf_path, so this is safe in a worker process.
+    metrics is extractors.extract's stats plus extract_s, the wall time of extraction and normalisation."""
+    t = time.perf_counter()
+    stats = {}
+    name, raw = extractors.extract(pdf_path, digest, chain, ocr_workers, stats, lang=ocr_lang(lang))
+    body = {"extract": extract_settings(name, lang, stats["truncated"]), **normalize_text(raw)}
+    stats["extract_s"] = round(time.perf_counter() - t, 4)
+    return {**body, "metrics": stats}
+
+def no_text_reason(metrics: dict) -> str:
+    errors = [a["error"] for a in metrics.get("attempts", []) if a["error"]]
+    if errors:
+        return "no text: " + "; ".join(errors)
+    if metrics.get("sparse_pages") and not metrics.get("ocr_pages"):
+        return "no text layer and OCR not available"
+    return "no text"
+
+def hash_pdf(pdf_path: pathlib.Path, metrics: dict) -> str:
+    t = time.perf_counter()
+    digest = sha256_file(pdf_path)
+    metrics["hash_s"] = round(time.perf_counter() - t, 4)
+    return digest
+
+def entry(row: dict) -> dict:
+    e = {k: row.get(k, "") for k in META_KEYS}
+    e["title"] = e["title"] or "(untitled)"
+    e.update((k, row[k]) for k in LANG_KEYS if row.get(k))
+    return e
+
+def make_record(rows: list, body: dict, digest: str) -> dict:
+    """One record per PDF: the first catalogue row's fields, the other rows as aliases."""
+    rec = entry(rows[0])
+    aliases = []
+    for row in rows[1:]:
+        e = entry(row)
+        if e != rec and e not in aliases:
+            aliases.append(e)
+    if aliases:
+        rec["aliases"] = aliases
+    rec.update({
+        "sha256": digest,
+        "extract": body["extract"],
+        "paras": body["paras"],
+        "pages": body["pages"],
+        "text": body["text"],
+    })
+    if LOWERCASE_FIELD:
+        rec["lc"] = body["text"].lower()
+    return rec
+
+def index_pdf(url: str, rows: list, tmpdir: pathlib.Path, prev: dict, metrics: dict):
+    """Returns (record or None, reused_previous_text); metrics (a build_report doc) is filled in."""
+    pdf_path = tmpdir / "doc.pdf"
+    ok = fetch(url, pdf_path, stats=metrics)
+    if not ok:
+        build_report.Report.finish(metrics, "failed", metrics["error"])
+        return None, False
+
+    digest = hash_pdf(pdf_path, metrics)
+    chain = chain_for(rows)
+    body = reusable_body(prev, url, digest, chain, doc_lang(rows))
+    reused = body is not None
+    if not reused:
+        body = extract_body(pdf_path, digest, chain, lang=doc_lang(rows))
+        metrics.update(body.pop("metrics"))
+    if not body["text"]:
+        build_report.Report.finish(metrics, "failed", no_text_reason(metrics))
+        return None, reused
+
+    build_report.Report.finish(metrics, "reused" if reused else "extracted")
+    return make_record(rows, body, digest), reused
+
+def index_sequential(items, tmproot: pathlib.Path, prev: dict, emit, report):
+    for i, url, rows in items:
+        rec, reused = index_pdf(url, rows, tmproot, prev, report.doc(i, url, rows))
+        if rec:
+            emit(i, rec, reused)
+
+def index_concurrent(items, tmproot: pathlib.Path, jobs: int, prev: dict, emit, report):
+    """Download on a bounded thread pool, extract on a process pool; emit() runs on the calling thread."""
+    finish = build_report.Report.finish
+    def download(i, url, metrics):
+        workdir = pathlib.Path(tempfile.mkdtemp(prefix=f"{i:04d}-", dir=tmproot))
+        pdf_path = workdir / "doc.pdf"
+        if not fetch(url, pdf_path, stats=metrics):
+            return None, None
+        return pdf_path, hash_pdf(pdf_path, metrics)
+
+    by_index = {i: (url, rows, report.doc(i, url, rows)) for i, url, rows in items}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetch_pool, \
+         ProcessPoolExecutor(max_workers=jobs) as extract_pool:
+        downloads = {fetch_pool.submit(download, i, url, by_index[i][2]): i for i, url, _ in items}
+        extracts, pdf_path_of, digests = {}, {}, {}
+        for fut in as_completed(downloads):
+            i = downloads[fut]
+            url, rows, metrics = by_index[i]
+            pdf_path, digest = fut.result()
+            if not pdf_path:
+                finish(metrics, "failed", metrics["error"])
+                continue
+            chain = chain_for(rows)
+            body = reusable_body(prev, url, digest, chain, doc_lang(rows))
+            if body is not None:
+                shutil.rmtree(pdf_path.parent, ignore_errors=True)
+                if body["text"]:
+                    finish(metrics, "reused")
+                    emit(i, make_record(rows, body, digest), True)
+                else:
+                    finish(metrics, "failed", "no text")
+                continue
+            pdf_path_of[i], digests[i] = pdf_path, digest
+            extracts[extract_pool.submit(extract_body, pdf_path, digest, chain, max(1, OCR_WORKERS // jobs),
+                                         doc_lang(rows))] = i
+        for fut in as_completed(extracts):
+            i = extracts[fut]
+            url, rows, metrics = by_index[i]
+            body = fut.result()
+            metrics.update(body.pop("metrics"))
+            shutil.rmtree(pdf_path_of[i].parent, ignore_errors=True)
+            if body["text"]:
+                finish(metrics, "extracted")
+                emit(i, make_record(rows, body, digests[i]), False)
+            else:
+                finish(metrics, "failed", no_text_reason(metrics))
 
-    return {
-        "url": url,
-        "title": meta.get("title") or "(untitled)",
-        "symbol": meta.get("symbol", ""),
-        "section": meta.get("section", ""),
-        "subsection": meta.get("subsection", ""),
-        "text": text,
-    }
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Build data/search_index.json from the catalogue PDFs.")
+    ap.add_argument("--jobs", type=int, default=int(os.environ.get("PACM_JOBS", "1")),
+                    help="parallel extraction processes (default: $PACM_JOBS or 1 = sequential)")
+    ap.add_argument("--extractor", choices=sorted(extractors.CHAINS), default=EXTRACTOR,
+                    help="text extractor (default: $PACM_EXTRACTOR or auto = pdftotext, then pdfminer)")
+    ap.add_argument("--offline", action="store_true",
+                    help="cache-only: use PDFs already in the HTTP cache, never hit the network")
+    ap.add_argument("--full", action="store_true",
+                    help="ignore the previous index and re-extract every PDF")
+    ap.add_argument("--lowercase-field", action="store_true",
+                    help="also store a lowercased copy of the text as \"lc\" for the client")
+    ap.add_argument("--page-chunks", action="store_true",
+                    help="also publish every page as its own text shard (page-scoped snippets on the site)")
+    sel = ap.add_argument_group("targeted rebuild",
+                                "process only these documents and patch them into the existing index; "
+                                "every other record is kept as it is (scripts/coverage.py shows what needs it)")
+    sel.add_argument("--only-missing", action="store_true", help="documents with no record in the index")
+    sel.add_argument("--only-stale", action="store_true",
+                     help="documents whose record has outdated catalogue fields or extractor settings")
+    sel.add_argument("--symbol", action="append", metavar="SYM",
+                     help="documents with this symbol (glob patterns allowed, e.g. 'A6.4-STAN-*'; repeatable)")
+    sel.add_argument("--section", action="append", metavar="NAME", help="documents in this catalogue section (repeatable)")
+    sel.add_argument("--lang", action="append", metavar="CODE",
+                     help="documents in this language (en, fr, es, ...; repeatable)")
+    sel.add_argument("--since", type=datetime.date.fromisoformat, metavar="YYYY-MM-DD",
+                     help="documents whose catalogue date is on or after this day")
+    sel.add_argument("--urls", type=read_urls, metavar="FILE",
+                     help="documents whose URL is listed in FILE, one per line (e.g. version_history.py --changed)")
+    ap.add_argument("--report", type=pathlib.Path, default=REPORT,
+                    help="per-document metrics and stage timings (default data/build_report.json)")
+    ap.add_argument("--profile", type=pathlib.Path, metavar="DIR",
+                    help="run every stage under cProfile and write DIR/<stage>.prof")
+    return ap.parse_args(argv)
 
-def main():
+def main(argv=None):
+    global LOWERCASE_FIELD, EXTRACTOR
+    args = parse_args(argv)
+    LOWERCASE_FIELD = args.lowercase_field
+    EXTRACTOR = args.extractor
+    if args.offline:
+        http_cache.set_offline()
     if not CATALOG.exists():
         print(f"ERROR: {CATALOG} not found", file=sys.stderr)
         sys.exit(1)
 
-    docs = json.loads(CATALOG.read_text())
-    out = []
-    tmpdir = pathlib.Path(tempfile.mkdtemp())
+    report = build_report.Report(args.report, vars(args), args.profile)
+    status = "failed"
     try:
-        for d in docs:
-            url = d.get("url", "")
-            if not url or not is_pdf_url(url):
-                continue
-            rec = index_pdf(url, d, tmpdir)
-            if rec:
-                out.append(rec)
-    finally:
-        pass
+        with report.stage("load"):
+            raw = CATALOG.read_bytes()
+            docs = json.loads(raw)
+            items = group_by_document(docs)
+            existing = load_previous(OUT)
+            prev = {} if args.full else existing
+            selected = select_items(items, args, existing)
+
+            header = {"journal": 2, "extract": [extract_settings(n) for n in extractors.CHAINS[EXTRACTOR]],
+                      "max_chars": extractors.MAX_TEXT_CHARS, "lowercase_field": LOWERCASE_FIELD,
+                      "page_chunks": args.page_chunks, "catalog": hashlib.sha256(raw).hexdigest()}
+            if selected is not None:
+                header["only"] = [i for i, _, _ in selected]
+            journal, done = open_journal(JOURNAL, header)
+        if done:
+            print(f"Resuming: {len(done)} records already in {JOURNAL.name}")
+        counts = report.counts = {"resumed": len(done), "reused": 0, "extracted": 0, "failed": 0, "kept": 0}
+        def emit(i, rec, reused):
+            done[i] = journal_append(journal, i, rec)
+            counts["reused" if reused else "extracted"] += 1
+        def keep(its):
+            """Targeted rebuild: copy the existing records of documents that are not (or could not be) rebuilt."""
+            for i, url, _ in its:
+                if i not in done and url in existing:
+                    done[i] = journal_append(journal, i, previous_record(existing, url), sync=False)
+                    counts["kept"] += 1
+            journal.flush()
+            os.fsync(journal.fileno())
 
-    DATA.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(out, ensure_ascii=False, indent=2))
-    print(f"Wrote {len(out)} records to {OUT}")
+        todo = [it for it in items if it[0] not in done]
+        if selected is not None:
+            print(f"Targeted rebuild: {len(selected)} of {len(items)} documents selected")
+            chosen = {i for i, _, _ in selected}
+            keep([it for it in todo if it[0] not in chosen])
+            todo = [it for it in todo if it[0] in chosen]
+        tmproot = pathlib.Path(tempfile.mkdtemp())
+        try:
+            with report.stage("index"):
+                if args.jobs > 1:
+                    index_concurrent(todo, tmproot, args.jobs, prev, emit, report)
+                else:
+                    index_sequential(todo, tmproot, prev, emit, report)
+                if selected is not None:
+                    keep(todo)  # a selected document that failed keeps its old record
+        finally:
+            journal.close()
+            shutil.rmtree(tmproot, ignore_errors=True)
+            counts["failed"] = sum(d["status"] == "failed" for d in report.docs)
+            counts["truncated"] = sum(bool(d.get("truncated")) for d in report.docs)
+
+        with report.stage("assemble"):
+            n = assemble_index(JOURNAL, [done[i] for i in sorted(done)], OUT)
+            JOURNAL.unlink()
+        with report.stage("manifest"):
+            m = manifest.build_manifest(OUT, DATA, page_chunks=args.page_chunks)
+        print(f"Wrote {manifest.MANIFEST} ({len(m['docs'])} docs, {len(m['postings'])} postings shards)")
+        with report.stage("corpus"):
+            corpus_store.write_corpus(OUT, OUT.with_suffix(".corpus"))
+        status = "ok"
+    finally:
+        summary = report.write(status)
+    rows = sum(1 for _, _, r in items for row in r if "row_url" not in row)
+    langs = Counter(doc_lang(r) for _, _, r in items)
+    per_lang = "" if set(langs) <= {"en"} else " [" + ", ".join(f"{k} {v}" for k, v in sorted(langs.items())) + " documents]"
+    print(f"Wrote {n} records for {rows} catalogue rows{per_lang} to {OUT} ({counts['resumed']} resumed, {counts['reused']} reused unchanged, "
+          f"{counts['extracted']} extracted, {counts['failed']} failed" + (f", {counts['kept']} kept" if selected is not None else "")
+          + (f", {counts['truncated']} cut at {extractors.MAX_TEXT_CHARS} characters" if counts["truncated"] else "") + ")")
+    build_report.print_summary(summary)
+    print(f"Wrote {args.report}" + (f" and profiles in {args.profile}" if args.profile else ""))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Per-document metrics and stage timings for a build_fulltext.py run.
+
+Every run writes data/build_report.json (--report PATH):
+  {started, seconds, status, args, counts, stages: {stage: seconds},
+   docs: [{i, url, rows, status, seconds, fetch_s, bytes, retries, hash_s,
+           extractor, attempts, pages, chars, sparse_pages, ocr_pages, ocr_used,
+           ocr_s, truncated, error}],
+   slowest_docs: [...], slowest_stages: [...], failures: {reason: count}}
+
+status is "extracted", "reused" (unchanged PDF, previous text kept) or
+"failed" with the reason in "error"; documents resumed from the journal are only
+counted. A document's "seconds" is the work done for it (download, hashing,
+extraction), not time spent queued. "attempts" lists every extractor tried
+({extractor, seconds, chars, error}, plus "page_s", seconds per page, from the
+pdfminer extractors); "ocr_pages" is the number of sparse pages
+sent to OCR and "ocr_used" how many of them the OCR text replaced; "truncated" is
+true when the text was cut at PACM_MAX_TEXT_CHARS. Downloads refused for size or
+type fail with "rejected: ..." as their error.
+
+Report.stage(name) times a block. With profile_dir set (--profile DIR) the block
+also runs under cProfile and DIR/<stage>.prof is written for pstats/snakeviz;
+extraction in --jobs worker processes is not profiled, its timing is per document.
+"""
+import json, os, time, pathlib, cProfile, contextlib
+from collections import Counter
+
+SLOWEST = 10
+
+class Report:
+    def __init__(self, path: pathlib.Path, args: dict = None, profile_dir: pathlib.Path = None):
+        self.path = pathlib.Path(path)
+        self.profile_dir = pathlib.Path(profile_dir) if profile_dir else None
+        self.started = time.time()
+        self.args = args or {}
+        self.stages = {}
+        self.docs = []
+        self.counts = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        prof = None
+        if self.profile_dir:
+            prof = cProfile.Profile()
+            prof.enable()
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0) + time.perf_counter() - t, 4)
+            if prof:
+                prof.disable()
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                prof.dump_stats(str(self.profile_dir / f"{name}.prof"))
+
+    def doc(self, i: int, url: str, rows: list) -> dict:
+        """A new metrics dict for one document; callers fill it in place."""
+        d = {"i": i, "url": url, "rows": len(rows), "status": None, "error": None}
+        self.docs.append(d)
+        return d
+
+    @staticmethod
+    def finish(d: dict, status: str, error: str = None):
+        d["status"], d["error"] = status, error
+        d["seconds"] = round(sum(d.get(k) or 0 for k in ("fetch_s", "hash_s", "extract_s")), 4)
+
+    def summary(self) -> dict:
+        done = [d for d in self.docs if d["status"]]
+        slowest = sorted(done, key=lambda d: d["seconds"], reverse=True)[:SLOWEST]
+        return {
+            "slowest_docs": [{k: d.get(k) for k in ("url", "status", "seconds", "fetch_s", "extract_s", "ocr_s", "pages")}
+                             for d in slowest],
+            "slowest_stages": sorted(self.stages.items(), key=lambda kv: kv[1], reverse=True),
+            "failures": dict(Counter(d["error"] for d in done if d["status"] == "failed").most_common()),
+        }
+
+    def write(self, status: str = "ok") -> dict:
+        report = {"started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+                  "seconds": round(time.time() - self.started, 3), "status": status, "args": self.args,
+                  "counts": self.counts, "stages": self.stages,
+                  "docs": sorted(self.docs, key=lambda d: d["i"]), **self.summary()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(report, ensure_ascii=False, indent=1, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+        return report
+
+def print_summary(report: dict, top: int = 5):
+    stages = ", ".join(f"{name} {secs:.1f}s" for name, secs in report["slowest_stages"])
+    print(f"Stages: {stages}")
+    if report["slowest_docs"]:
+        print("Slowest documents:")
+        for d in report["slowest_docs"][:top]:
+            parts = [f"{k[:-2]} {d[k]:.1f}s" for k in ("fetch_s", "extract_s", "ocr_s") if d.get(k)]
+            print(f"  {d['seconds']:7.1f}s  {d['url']}" + (f" ({', '.join(parts)})" if parts else ""))
+    if report["failures"]:
+        print(f"Failed documents: {sum(report['failures'].values())}")
+        for reason, n in report["failures"].items():
+            print(f"  {n:4d}  {reason}")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Builds the catalogue table once, at build time, instead of in every browser.
+
+Reads:  data/a64_catalogue.json
+Writes: data/catalogue_view.json   compact pre-grouped view for client-side filtering
+        index.html                 the rendered table, between the "Catalogue table START/END" markers
+
+The steps the page used to run on every load and keystroke happen here once:
+  display_symbol   the document symbol proper ("5/CMA.6", "A6.4-STAN-METH-001",
+                   "FCCC/PA/CMA/2024/2/Add.1") out of whatever the Symbol cell held
+  dedupe           one row per display symbol (rows without one: per URL, fragment
+                   dropped); the row with more of date/version/type/section/subsection wins
+  sort             by section, subsection, title (case-insensitive)
+  group            section -> subsection -> rows; rows without a section go under "Other"
+
+catalogue_view.json:
+  {"view": 1, "catalog": <sha256 of the catalogue>, "columns": [title, url, symbol, version, date, notes],
+   "groups": [{"section": S, "subsections": [{"subsection": SS, "rows": [[...], ...]}, ...]}, ...]}
+Rows are numbered in document order across groups; the rendered <tr class="doc-row">
+carries the same number as data-i, so assets/app.js filters the static rows by
+toggling them and never fetches the catalogue or sorts anything on first paint.
+The table's data-view attribute points at the view JSON with its hash as a
+cache-buster.
+
+Usage: build_view.py [--catalogue PATH] [--html index.html] [--out data/catalogue_view.json] [--check]
+--check exits 1 when index.html or the view JSON is out of date (for CI).
+"""
+import re, sys, json, html, hashlib, pathlib, argparse
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CATALOG = ROOT / "data" / "a64_catalogue.json"
+VIEW = ROOT / "data" / "catalogue_view.json"
+INDEX_HTML = ROOT / "index.html"
+
+VIEW_VERSION = 1
+COLUMNS = ("title", "url", "symbol", "version", "date", "notes")
+HEADERS = ("Document", "Symbol", "Version", "Entry into force / Date")
+SCORE_FIELDS = ("date", "version", "type", "section", "subsection")
+OTHER = "Other"
+
+SYMBOL_RES = [re.compile(p, re.I) for p in (
+    r"(\d+/CMA\.\d)",
+    r"(A6\.4-[A-Z]+(?:-[A-Z]+)*-\d{3})",
+    r"(FCCC/PA/CMA/\d{4}/[\w./-]+)",
+)]
+TABLE_RE = re.compile(r"(<!-- Catalogue table START -->\n).*?(\n[ \t]*<!-- Catalogue table END -->)", re.S)
+
+def display_symbol(sym) -> str:
+    s = str(sym or "").strip()
+    for rx in SYMBOL_RES:
+        m = rx.search(s)
+        if m:
+            return m.group(1)
+    return s
+
+def score(row: dict) -> int:
+    return sum(1 for k in SCORE_FIELDS if str(row.get(k) or "").strip())
+
+def dedupe(rows: list) -> list:
+    """First occurrence keeps its position; a later duplicate with a higher score replaces it."""
+    out, pos = [], {}
+    for r in rows:
+        key = display_symbol(r.get("symbol")) or (r.get("url") or "").split("#")[0]
+        if not key:
+            out.append(r)
+        elif key not in pos:
+            pos[key] = len(out)
+            out.append(r)
+        elif score(r) > score(out[pos[key]]):
+            out[pos[key]] = r
+    return out
+
+def sort_key(s: str):
+    return (s.casefold(), s)
+
+def group(rows: list) -> list:
+    """[{section, subsections: [{subsection, rows}]}], sorted; row fields are COLUMNS in order."""
+    tree = {}
+    for r in rows:
+        sec = (r.get("section") or "").strip() or OTHER
+        sub = (r.get("subsection") or "").strip()
+        tree.setdefault(sec, {}).setdefault(sub, []).append(r)
+    groups = []
+    for sec in sorted(tree, key=sort_key):
+        subs = []
+        for sub in sorted(tree[sec], key=sort_key):
+            items = sorted(tree[sec][sub], key=lambda r: sort_key(r.get("title") or ""))
+            subs.append({"subsection": sub, "rows": [
+                [r.get("title") or "(untitled)", r.get("url") or "", display_symbol(r.get("symbol")),
+                 r.get("version") or "", r.get("date") or "", r.get("notes") or ""] for r in items]})
+        groups.append({"section": sec, "subsections": subs})
+    return groups
+
+def build_view(catalogue: list, digest: str) -> dict:
+    return {"view": VIEW_VERSION, "catalog": digest, "columns": list(COLUMNS), "groups": group(dedupe(catalogue))}
+
+def esc(s: str) -> str:
+    return html.escape(s or "", quote=True)
+
+def render_table(view: dict, view_url: str) -> str:
+    """The <table id="doc-table"> element, indented to sit inside <main>."""
+    ncol = len(HEADERS)
+    out = [f'    <table id="doc-table" class="doc-table" data-view="{esc(view_url)}">',
+           "      <thead><tr>" + "".join(f"<th>{esc(h)}</th>" for h in HEADERS) + "</tr></thead>",
+           '      <tbody id="doc-tbody">']
+    i = 0
+    for g in view["groups"]:
+        out.append(f'        <tr class="group-row"><td colspan="{ncol}">{esc(g["section"])}</td></tr>')
+        for sub in g["subsections"]:
+            if sub["subsection"]:
+                out.append(f'        <tr class="subgroup-row"><td colspan="{ncol}">{esc(sub["subsection"])}</td></tr>')
+            for title, url, symbol, version, date, _notes in sub["rows"]:
+                out.append(f'        <tr class="doc-row" data-i="{i}">'
+                           f'<td class="cell-title"><a href="{esc(url) or "#"}" target="_blank" rel="noopener">{esc(title)}</a></td>'
+                           f'<td class="cell-symbol">{esc(symbol)}</td><td class="cell-version">{esc(version)}</td>'
+                           f'<td class="cell-date">{esc(date)}</td></tr>')
+                i += 1
+    out += ["      </tbody>", "    </table>"]
+    return "\n".join(out)
+
+def inject(page: str, table: str) -> str:
+    if not TABLE_RE.search(page):
+        raise ValueError("index.html has no <!-- Catalogue table START/END --> markers")
+    return TABLE_RE.sub(lambda m: m.group(1) + table + m.group(2), page, count=1)
+
+def write_if_changed(path: pathlib.Path, text: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+    return True
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Pre-group the catalogue and render its table into index.html.")
+    ap.add_argument("--catalogue", type=pathlib.Path, default=CATALOG)
+    ap.add_argument("--html", type=pathlib.Path, default=INDEX_HTML)
+    ap.add_argument("--out", type=pathlib.Path, default=VIEW)
+    ap.add_argument("--check", action="store_true", help="only report whether the outputs are up to date")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    raw = args.catalogue.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    view = build_view(json.loads(raw), digest)
+    view_text = json.dumps(view, ensure_ascii=False, separators=(",", ":")) + "\n"
+    try:
+        view_url = args.out.resolve().relative_to(args.html.resolve().parent).as_posix()
+    except ValueError:
+        view_url = args.out.name
+    view_url += "?v=" + hashlib.sha256(view_text.encode("utf-8")).hexdigest()[:12]
+    page = inject(args.html.read_text(encoding="utf-8"), render_table(view, view_url))
+    nrows = sum(len(s["rows"]) for g in view["groups"] for s in g["subsections"])
+
+    if args.check:
+        stale = [p for p, text in ((args.out, view_text), (args.html, page))
+                 if not p.exists() or p.read_text(encoding="utf-8") != text]
+        for p in stale:
+            print(f"Out of date: {p}")
+        sys.exit(1 if stale else 0)
+    wrote = [p.name for p, text in ((args.out, view_text), (args.html, page)) if write_if_changed(p, text)]
+    print(f"{nrows} rows in {len(view['groups'])} sections from {len(json.loads(raw))} catalogue rows; "
+          + (f"wrote {', '.join(wrote)}" if wrote else "unchanged"))
+
+if __name__ == "__main__":
+    main()
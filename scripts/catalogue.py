@@ -0,0 +1,264 @@
+# scripts/catalogue.py
+"""
+Indexed in-memory view of data/a64_catalogue.json shared by the catalogue scripts.
+
+Catalogue.load() reads the file once; lookups go through hash indexes on url,
+normalised symbol and (symbol, title) instead of scanning the rows, and every
+operation works on the loaded rows:
+  merge_meetings(meetings)       merge_meetings.py: meeting reports in, by url then symbol
+  preserve_manual(old)           preserve_manual_fields.py: keep section/subsection/notes
+  patch(where, update, drop)     set/remove fields on matching rows (cleanup_meeting_subsections.py)
+  validate(required)             check_counts.py: required symbols/titles, missing urls, duplicates
+save() writes the file once, atomically (temp file + rename), and not at all when
+nothing changed.
+
+Run several operations over a single load/save:
+  catalogue.py [--preserve OLD] [--merge-meetings] [--cleanup-meetings] [--validate]
+"""
+import re, json, os, argparse, pathlib, datetime
+DATA = pathlib.Path("data")
+CAT  = DATA / "a64_catalogue.json"
+MEET = DATA / "meetings.json"
+
+MEETING_SECTION = "Meeting reports of the Supervisory Body"
+MANUAL_FIELDS   = ("section","subsection","notes")
+FIELD_ORDER     = ["title","url","symbol","version","date","section","subsection","notes"]
+MEETING_ORDER   = ["title","url","symbol","version","date","section","notes"]
+
+MONTHS = {m: n for n, m in enumerate(("jan", "feb", "mar", "apr", "may", "jun",
+                                      "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+DATE_RE = re.compile(r"(\d{1,2})\s+([A-Za-z]{3})[a-z]*\.?\s+(\d{4})")
+
+def parse_day(s):
+    """The first "31 Mar. 2024" / "22 Aug 2025" style date in s as a datetime.date, or None."""
+    m = DATE_RE.search(s or "")
+    try:
+        if m and m.group(2).lower() in MONTHS:
+            return datetime.date(int(m.group(3)), MONTHS[m.group(2).lower()], int(m.group(1)))
+    except ValueError:
+        pass
+    return None
+
+def normalize_symbol(s):
+    return s.strip().replace("–","-").replace("—","-").upper() if s else s
+
+def order_fields(d, order=FIELD_ORDER):
+    return {**{k:d[k] for k in order if k in d}, **{k:v for k,v in d.items() if k not in order}}
+
+def dumps(rows):
+    return json.dumps(rows, ensure_ascii=False, indent=2)
+
+def load_json(path, default):
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else default
+
+class Catalogue:
+    def __init__(self, rows, path=None, raw=None):
+        self.rows = rows
+        self.path = path
+        self._raw = raw
+        self._indexes = None
+
+    @classmethod
+    def load(cls, path=CAT):
+        path = pathlib.Path(path)
+        raw = path.read_text(encoding="utf-8") if path.exists() else None
+        return cls(json.loads(raw) if raw is not None else [], path, raw)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    # -- indexes (the last row wins on duplicate keys, as the scripts' dict comprehensions did) --
+    def changed(self):
+        """Call after changing self.rows directly; indexes are rebuilt on next use."""
+        self._indexes = None
+
+    def _index(self):
+        if self._indexes is None:
+            by_url, by_symbol, by_sig, by_title = {}, {}, {}, {}
+            for r in self.rows:
+                if r.get("url"): by_url[r["url"]] = r
+                sym = normalize_symbol(r.get("symbol") or "")
+                if sym:
+                    by_symbol[sym] = r
+                    if r.get("title"): by_sig[(sym, r["title"])] = r
+                if r.get("title"): by_title[r["title"]] = r
+            self._indexes = {"url": by_url, "symbol": by_symbol, "sig": by_sig, "title": by_title}
+        return self._indexes
+
+    def by_url(self, url):
+        return self._index()["url"].get(url)
+
+    def by_symbol(self, symbol):
+        return self._index()["symbol"].get(normalize_symbol(symbol or ""))
+
+    def by_signature(self, symbol, title):
+        return self._index()["sig"].get((normalize_symbol(symbol or ""), title))
+
+    def by_title(self, title):
+        return self._index()["title"].get(title)
+
+    # -- operations ----------------------------------------------------------------------------
+    def merge_meetings(self, meetings):
+        """Fold meeting reports in: rows are matched by url, url-less rows by symbol;
+        unmatched reports are appended. Returns the number of merged + added reports."""
+        clean = []
+        for m in meetings:
+            m = dict(m)
+            m["symbol"] = normalize_symbol(m.get("symbol",""))
+            m["section"] = MEETING_SECTION
+            m.pop("subsection", None)
+            clean.append(m)
+        rep_by_url, rep_by_symbol = {}, {}
+        for m in clean:
+            if m.get("url"): rep_by_url.setdefault(m["url"], m)
+            if m.get("symbol"): rep_by_symbol.setdefault(m["symbol"], m)
+        cat_symbols = self._index()["symbol"]
+
+        next_cat, seen, n = [], set(), 0
+        for row in self.rows:
+            if row.get("url"):
+                rep = rep_by_url.get(row["url"])
+            else:
+                rep = rep_by_symbol.get(normalize_symbol(row.get("symbol") or "")) if row.get("symbol") else None
+            if rep:
+                seen.add(rep.get("url"))
+                if row.get("notes") and not rep.get("notes"):
+                    rep["notes"] = row["notes"]
+                merged = {**row, **rep}
+                merged.pop("subsection", None)
+                next_cat.append(order_fields(merged, MEETING_ORDER))
+                n += 1
+            else:
+                next_cat.append(row)
+
+        for m in clean:
+            if m.get("url") not in seen and m.get("symbol") not in cat_symbols:
+                next_cat.append(order_fields(m, MEETING_ORDER))
+                n += 1
+        self.rows = next_cat
+        self.changed()
+        return n
+
+    def preserve_manual(self, old):
+        """Copy non-empty section/subsection/notes from the matching row of old (a Catalogue):
+        same url, else same (symbol, title), else same title. Returns the number of matched rows."""
+        n = 0
+        out = []
+        for row in self.rows:
+            prev = (old.by_url(row["url"]) if row.get("url") else None) \
+                or old.by_signature(row.get("symbol"), row.get("title")) \
+                or old.by_title(row.get("title"))
+            if prev:
+                n += 1
+                for k in MANUAL_FIELDS:
+                    v = prev.get(k)
+                    if v not in (None, "", []):
+                        row[k] = v
+            out.append(order_fields(row))
+        self.rows = out
+        self.changed()
+        return n
+
+    def patch(self, where, update=None, drop=()):
+        """Set update's fields and remove drop's fields on every row where(row) is true.
+        Returns the number of rows that actually changed."""
+        n = 0
+        for row in self.rows:
+            if not where(row):
+                continue
+            before = dict(row)
+            row.update(update or {})
+            for k in drop:
+                row.pop(k, None)
+            n += row != before
+        if n:
+            self.changed()
+        return n
+
+    def validate(self, required=None):
+        """{missing, wrong_titles, no_url, duplicates}: required is {symbol: expected title}."""
+        problems = {"missing": [], "wrong_titles": [], "no_url": [], "duplicates": []}
+        for sym, title in (required or {}).items():
+            row = self.by_symbol(sym)
+            if row is None:
+                problems["missing"].append(sym)
+            elif row.get("title") != title:
+                problems["wrong_titles"].append((sym, row.get("title"), title))
+        seen = set()
+        for r in self.rows:
+            if not r.get("url"):
+                problems["no_url"].append(r.get("title") or r.get("symbol") or "(untitled)")
+            key = (r.get("url"), r.get("title"))
+            if key in seen:
+                problems["duplicates"].append(key)
+            seen.add(key)
+        return problems
+
+    # -- persistence ---------------------------------------------------------------------------
+    def save(self, path=None):
+        """Atomically write the rows if they differ from what was loaded; returns True if written."""
+        path = pathlib.Path(path or self.path or CAT)
+        text = dumps(self.rows)
+        if path == self.path and text == self._raw:
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        self.path, self._raw = path, text
+        return True
+
+def is_meeting_report(row):
+    return (row.get("section") or "").strip() == MEETING_SECTION
+
+def print_validation(cat, problems):
+    print(f"Total: {len(cat)}")
+    if problems["missing"]:
+        print("\nMissing required Annual report/Addendum symbols (should be injected):")
+        for k in problems["missing"]: print(" -", k)
+    else:
+        print("\nAll required Annual report/Addendum symbols are present.")
+    if problems["wrong_titles"]:
+        print("\nTitles needing normalization:")
+        for k, found, expected in problems["wrong_titles"]: print(f" - {k}: found '{found}', expected '{expected}'")
+    else:
+        print("\nAll mapped titles match the expected phrasing.")
+    if problems["no_url"]:
+        print(f"\nRows without a URL: {len(problems['no_url'])}")
+    if problems["duplicates"]:
+        print(f"\nDuplicate (url, title) rows: {len(problems['duplicates'])}")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Run catalogue operations over one load and one save.")
+    ap.add_argument("--catalogue", type=pathlib.Path, default=CAT)
+    ap.add_argument("--preserve", type=pathlib.Path, metavar="OLD",
+                    help="keep section/subsection/notes from an earlier catalogue file")
+    ap.add_argument("--merge-meetings", nargs="?", const=MEET, type=pathlib.Path, metavar="MEETINGS",
+                    help=f"merge meeting reports (default {MEET})")
+    ap.add_argument("--cleanup-meetings", action="store_true", help="drop subsection from meeting reports")
+    ap.add_argument("--validate", action="store_true", help="report required CMA symbols/titles and row problems")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    cat = Catalogue.load(args.catalogue)
+    if args.preserve:
+        n = cat.preserve_manual(Catalogue.load(args.preserve))
+        print(f"Preserved manual fields for {len(cat)} items ({n} matched)")
+    if args.merge_meetings:
+        meet = load_json(args.merge_meetings, [])
+        cat.merge_meetings(meet)
+        print(f"Merged {len(meet)} meeting reports into catalogue ({len(cat)} total rows).")
+    if args.cleanup_meetings:
+        n = cat.patch(lambda r: is_meeting_report(r) and "subsection" in r, drop=("subsection",))
+        print(f"Removed subsection from {n} meeting report rows. Total rows: {len(cat)}.")
+    if args.validate:
+        from check_counts import REQUIRED
+        print_validation(cat, cat.validate(REQUIRED))
+    print(f"{'Wrote' if cat.save() else 'Unchanged:'} {cat.path}")
+
+if __name__ == "__main__":
+    main()
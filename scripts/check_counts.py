@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import json
+from catalogue import Catalogue, CAT, print_validation
 
 REQUIRED = {
   "FCCC/PA/CMA/2022/6": "Annual report (reporting period 28 Jul. - 22 Sep. 2022)",
@@ -11,22 +11,9 @@ REQUIRED = {
   "FCCC/PA/CMA/2024/2/Add.1": "Addendum (reporting period 19 Jul. 2024 - 9 Oct. 2024)",
 }
 
-with open("data/a64_catalogue.json","r",encoding="utf-8") as f:
-  data = json.load(f)
+def main():
+  cat = Catalogue.load(CAT)
+  print_validation(cat, cat.validate(REQUIRED))
 
-by_sym = { (d.get("symbol") or "").strip(): d for d in data if (d.get("symbol") or "").strip().startswith("FCCC/PA/CMA/") }
-
-missing = [k for k in REQUIRED if k not in by_sym]
-wrong   = [k for k,v in REQUIRED.items() if (k in by_sym and by_sym[k].get("title") != v)]
-
-print(f"Total: {len(data)}")
-if missing:
-  print("\\nMissing required Annual report/Addendum symbols (should be injected):")
-  for k in missing: print(" -", k)
-else:
-  print("\\nAll required Annual report/Addendum symbols are present.")
-if wrong:
-  print("\\nTitles needing normalization:")
-  for k in wrong: print(f" - {k}: found '{by_sym[k].get('title')}', expected '{REQUIRED[k]}'")
-else:
-  print("\\nAll mapped titles match the expected phrasing.")
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Checks that assets/postings.js computes the same postings shard keys as
+scripts/postings.py, which writes the shards: a term the client keys
+differently is silently never found.
+
+Runs shardKey() from postings.js under node on SAMPLES (plus any terms given on
+the command line) and compares each key with postings.shard_key. Exits 1 on a
+mismatch, 2 when node is not installed.
+
+Usage: check_shard_keys.py [TERM ...]
+"""
+import sys, json, shutil, pathlib, subprocess
+import postings
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CLIENT = ROOT / "assets" / "postings.js"
+
+SAMPLES = [
+    "eau", "x", "9", "2024", "été", "é", "ça", "über", "naïve", "ñu", "ﬁnance", "ﬀ", "ǆx", "½", "1⁄2",
+    "aα", "aб", "eд", "a中", "1ا", "ß", "Ωmega", "ال", "السلام", "气候", "变化", "россия", "ё", "𠀀字",
+]
+
+# evaluates postings.js with just enough of a browser around it, then prints [[term, key], ...]
+NODE = """
+const fs=require('fs'); global.location={search:''}; global.localStorage={getItem:()=>null,setItem(){}}; global.window={};
+const src=fs.readFileSync(process.argv[1],'utf8').replace("window.PACM_postings={", "window.PACM_postings={ shardKey,");
+eval(src);
+const terms=JSON.parse(fs.readFileSync(0,'utf8'));
+console.log(JSON.stringify(terms.map(t=>[t, window.PACM_postings.shardKey(t)])));
+"""
+
+def client_keys(terms: list) -> dict:
+    r = subprocess.run(["node", "-e", NODE, str(CLIENT)], input=json.dumps(terms), capture_output=True,
+                       text=True, encoding="utf-8", check=True)
+    return dict(json.loads(r.stdout))
+
+def main(argv=None):
+    terms = SAMPLES + list(sys.argv[1:] if argv is None else argv)
+    if not shutil.which("node"):
+        print("node not found: cannot run assets/postings.js", file=sys.stderr)
+        sys.exit(2)
+    js = client_keys(terms)
+    bad = [(t, postings.shard_key(t), js.get(t)) for t in terms if postings.shard_key(t) != js.get(t)]
+    for t, py, k in bad:
+        print(f"  {t!r}: postings.py {py!r}, postings.js {k!r}")
+    print(f"{len(terms) - len(bad)} of {len(terms)} shard keys match")
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
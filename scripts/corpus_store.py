@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Compact binary corpus next to data/search_index.json, read through mmap.
+
+Layout of data/search_index.corpus (little endian):
+  header   magic b"PACMCRP1", u32 version, u32 n, u64 table_off, u64 meta_off, u64 blob_off
+  table    n fixed-width entries: u64 text_off, u64 text_len, u32 meta_off, u32 meta_len
+           (text_off/meta_off relative to blob_off/meta_off)
+  meta     per-document JSON {url,title,symbol,section,subsection[,lang,row_url][,aliases],sha256,chars[,pages]}
+           (pages: the record's page start offsets, in characters)
+  blob     every document's text, UTF-8, concatenated
+
+Corpus(path) maps the file read-only; text_view() returns zero-copy memoryview
+slices of one document (or a byte range of it), text() decodes one document.
+Opening the corpus costs the same whatever its size, and pages are loaded by the
+OS only when touched. Release memoryviews before close().
+
+build_fulltext.py writes the corpus after every build; open_corpus() rebuilds it
+when it is missing or older than the index.
+"""
+import json, os, sys, mmap, struct, pathlib, tempfile, shutil
+from postings import iter_records
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+INDEX = ROOT / 'data' / 'search_index.json'
+CORPUS = ROOT / 'data' / 'search_index.corpus'
+
+MAGIC = b"PACMCRP1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+ENTRY = struct.Struct("<QQII")
+META_KEYS = ("url", "title", "symbol", "section", "subsection", "sha256")
+
+def write_corpus(index_path: pathlib.Path = INDEX, out: pathlib.Path = CORPUS) -> int:
+    """Stream index records into out; returns the number of documents."""
+    entries, metas = [], []
+    meta_off = 0
+    with tempfile.TemporaryFile() as blob:
+        for rec in iter_records(index_path):
+            data = (rec.get("text") or "").encode("utf-8")
+            meta = {k: rec.get(k, "") for k in META_KEYS}
+            meta.update((k, rec[k]) for k in ("lang", "row_url", "aliases", "pages") if rec.get(k))
+            meta["chars"] = len(rec.get("text") or "")
+            mb = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            entries.append((blob.tell(), len(data), meta_off, len(mb)))
+            metas.append(mb)
+            meta_off += len(mb)
+            blob.write(data)
+
+        n = len(entries)
+        table_off = HEADER.size
+        meta_start = table_off + n * ENTRY.size
+        blob_start = meta_start + meta_off
+        tmp = out.with_name(out.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, n, table_off, meta_start, blob_start))
+            for e in entries:
+                f.write(ENTRY.pack(*e))
+            for mb in metas:
+                f.write(mb)
+            blob.seek(0)
+            shutil.copyfileobj(blob, f)
+        os.replace(tmp, out)
+    return n
+
+class Corpus:
+    def __init__(self, path: pathlib.Path = CORPUS):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self._table, self._meta, self._blob = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a version {VERSION} PACM corpus")
+        self._view = memoryview(self._mm)
+
+    def __len__(self):
+        return self.n
+
+    def _entry(self, i: int):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return ENTRY.unpack_from(self._mm, self._table + i * ENTRY.size)
+
+    def meta(self, i: int) -> dict:
+        _, _, off, length = self._entry(i)
+        return json.loads(self._mm[self._meta + off:self._meta + off + length])
+
+    def text_view(self, i: int, start: int = 0, end: int = None) -> memoryview:
+        """Zero-copy UTF-8 bytes of document i, optionally the byte range [start, end)."""
+        off, length, _, _ = self._entry(i)
+        end = length if end is None else min(end, length)
+        return self._view[self._blob + off + start:self._blob + off + end]
+
+    def text(self, i: int) -> str:
+        with self.text_view(i) as v:
+            return str(v, "utf-8")
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.meta(i), self.text(i)
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_corpus(index_path: pathlib.Path = INDEX, path: pathlib.Path = CORPUS) -> Corpus:
+    """Corpus for index_path, (re)writing it first if missing or stale."""
+    if not path.exists() or path.stat().st_mtime < index_path.stat().st_mtime:
+        write_corpus(index_path, path)
+    return Corpus(path)
+
+def main():
+    if not INDEX.exists():
+        print(f"ERROR: {INDEX} not found", file=sys.stderr)
+        sys.exit(1)
+    n = write_corpus()
+    print(f"Wrote {n} documents to {CORPUS} ({CORPUS.stat().st_size} bytes)")
+
+if __name__ == "__main__":
+    main()
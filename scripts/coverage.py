@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Catalogue-vs-index coverage diff: which catalogue documents data/search_index.json
+covers, and why the others are not there.
+
+Every catalogue row is classified:
+  indexed     its PDF has an up-to-date record (directly or as one of its "aliases")
+  missing     its PDF has no record; the reason is taken from the last build's
+              data/build_report.json when it has one (fetch error, no text, ...)
+  stale       the record exists but a rebuild from the same PDF would change it:
+              the row's title/symbol/section/subsection changed, or the text came
+              from other extractor settings or predates incremental builds
+  not-pdf     the row links to something that is not a PDF (a symbol search page,
+              an HTML page) or has no URL, so it never gets a record
+and every index record whose URL no catalogue row has is reported as
+  orphaned    the next build drops it
+
+Other-language versions (a row's "languages") are classified like rows of their
+own, with their "lang".
+Rows sharing a PDF are listed once each but share one record, so the gap between
+catalogue rows and index records is the not-pdf rows, the aliases and the missing
+documents, less any orphans.
+
+Usage: coverage.py [--catalogue PATH] [--index PATH] [--report PATH] [--extractor NAME]
+                   [--show missing,stale,orphaned,not-pdf] [--json]
+Fix what it finds with build_fulltext.py --only-missing / --only-stale (or --symbol, --section).
+"""
+import json, pathlib, argparse
+from collections import Counter
+import build_fulltext as bf
+import extractors
+
+STATUSES = ("indexed", "missing", "stale", "not-pdf", "orphaned")
+
+def last_errors(report_path: pathlib.Path) -> dict:
+    """url -> failure reason from a build report, for documents that failed in that run."""
+    try:
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {d["url"]: d["error"] for d in report.get("docs", []) if d.get("status") == "failed"}
+
+def diff(catalogue: list, prev: dict, errors: dict = None) -> list:
+    """[{status, reason, url, symbol, title, section, lang}]: one entry per catalogue row, then one per orphan."""
+    errors = errors or {}
+    out = []
+    groups = bf.group_by_document(catalogue)
+    by_row = {}
+    for _, url, rows in groups:
+        status, reason = bf.doc_status(url, rows, prev)
+        if status == "missing" and url in errors:
+            reason = f"last build: {errors[url]}"
+        for r in rows:
+            by_row[id(r)] = (status, reason, url)
+    for r in bf.document_rows(catalogue):
+        if id(r) in by_row:
+            status, reason, url = by_row[id(r)]
+        else:
+            status, url = "not-pdf", r.get("url") or ""
+            reason = "no url" if not url else "not a PDF link"
+        out.append({"status": status, "reason": reason, "url": url, "symbol": r.get("symbol") or "",
+                    "title": r.get("title") or "", "section": r.get("section") or "", "lang": r.get("lang") or "en"})
+    known = {url for _, url, _ in groups}
+    for url, info in prev.items():
+        if url not in known:
+            meta = info["meta"]
+            out.append({"status": "orphaned", "reason": "no catalogue row", "url": meta["url"],
+                        "symbol": meta["symbol"], "title": meta["title"], "section": meta["section"],
+                        "lang": meta.get("lang") or "en"})
+    return out
+
+def summary(entries: list, records: int) -> dict:
+    counts = Counter(e["status"] for e in entries)
+    return {"rows": sum(counts[s] for s in STATUSES if s != "orphaned"), "records": records,
+            **{s: counts[s] for s in STATUSES}}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Classify catalogue documents against the full-text index.")
+    ap.add_argument("--catalogue", type=pathlib.Path, default=bf.CATALOG)
+    ap.add_argument("--index", type=pathlib.Path, default=bf.OUT)
+    ap.add_argument("--report", type=pathlib.Path, default=bf.REPORT, help="build report with failure reasons")
+    ap.add_argument("--extractor", choices=sorted(extractors.CHAINS), default=bf.EXTRACTOR,
+                    help="extractor the index is expected to come from (as build_fulltext.py --extractor)")
+    ap.add_argument("--show", default="missing,stale,orphaned,not-pdf",
+                    help="comma-separated statuses to list (summary counts are always printed)")
+    ap.add_argument("--json", action="store_true", help="print {summary, entries} as JSON")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    bf.EXTRACTOR = args.extractor
+    catalogue = json.loads(args.catalogue.read_text(encoding="utf-8"))
+    prev = bf.load_previous(args.index)
+    entries = diff(catalogue, prev, last_errors(args.report))
+    totals = summary(entries, len(prev))
+    if args.json:
+        print(json.dumps({"summary": totals, "entries": entries}, ensure_ascii=False, indent=2))
+        return
+    print(f"{totals['rows']} catalogue rows, {totals['records']} index records: "
+          + ", ".join(f"{totals[s]} {s}" for s in STATUSES))
+    show = [s.strip() for s in args.show.split(",") if s.strip()]
+    for status in show:
+        listed = [e for e in entries if e["status"] == status]
+        if not listed:
+            continue
+        print(f"\n{status} ({len(listed)}):")
+        for e in listed:
+            label = (e["symbol"] or e["title"][:60]) + ("" if e["lang"] == "en" else f" [{e['lang']}]")
+            print(f"  {label:<32} {e['reason']:<40} {e['url']}")
+    hints = [flag for flag, s in (("--only-missing", "missing"), ("--only-stale", "stale")) if totals[s]]
+    if hints:
+        print(f"\nRebuild just these: python3 scripts/build_fulltext.py {' '.join(hints)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Speed / quality comparison of the PDF text extractors (scripts/extractors.py).
+
+Runs every available extractor over a directory of local PDF fixtures (no
+network, no OCR cache) and reports per extractor:
+  docs, pages, MB          what it processed
+  pages/s, MB/s            throughput (wall time of the extractor alone)
+  empty                    pages with fewer than MIN_PAGE_CHARS characters,
+                           i.e. pages the build would send to OCR
+  agreement                mean token F1 against the reference extractor: tokens
+                           (scripts/postings.py tokenizer) counted as a multiset,
+                           so 1.0 means the same words the same number of times
+
+The reference is --reference (default pdftotext); when it is not installed or
+not run, the first extractor that ran is used instead (e.g. pdfminer, to compare
+pdfminer-fast with it) and the output names the reference actually used.
+
+Usage:
+  extract_bench.py FIXTURE_DIR [--extractors pdftotext,pdfminer,pdfminer-fast,ocr] [--reference pdftotext]
+                   [--jobs N] [--json]
+
+--jobs sets the worker count for extractors that parallelise pages (ocr, and
+pdfminer/pdfminer-fast on long documents).
+--json prints {fixtures, reference, results:[{extractor,docs,pages,mb,seconds,
+pages_per_s,mb_per_s,empty_pages,failed,agreement,per_doc:[{file,pages,seconds,
+chars,error,agreement,page_s}]}]} instead of the table; page_s is the seconds
+per page for extractors that time pages (pdfminer), "slowest page" in the table.
+"""
+import json, sys, time, shutil, pathlib, argparse, tempfile
+from collections import Counter
+import extractors
+from postings import tokenize
+
+def token_f1(a: str, b: str) -> float:
+    ta, tb = Counter(tokenize(a)), Counter(tokenize(b))
+    if not ta and not tb:
+        return 1.0
+    common = sum((ta & tb).values())
+    if not common:
+        return 0.0
+    p, r = common / sum(ta.values()), common / sum(tb.values())
+    return 2 * p * r / (p + r)
+
+def run_extractor(name: str, pdfs: list, jobs: int) -> dict:
+    ext = extractors.EXTRACTORS[name]
+    per_doc, texts = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for pdf in pdfs:
+            # work on a private copy: extractors write scratch files next to the PDF
+            work = pathlib.Path(tmp) / "doc.pdf"
+            shutil.copyfile(pdf, work)
+            t, timings = time.perf_counter(), []
+            try:
+                pages, error = ext.pages(work, jobs, timings=timings), None
+            except extractors.ExtractionError as e:
+                pages, error = [], str(e)
+            took = time.perf_counter() - t
+            texts[pdf.name] = "\f".join(pages)
+            per_doc.append({
+                "file": pdf.name, "bytes": pdf.stat().st_size, "pages": len(pages), "seconds": round(took, 4),
+                "chars": sum(len(p) for p in pages),
+                "empty_pages": sum(len(p.strip()) < extractors.MIN_PAGE_CHARS for p in pages),
+                "error": error, "page_s": [round(s, 4) for s in timings] or None,
+            })
+    secs = sum(d["seconds"] for d in per_doc) or 1e-9
+    mb = sum(d["bytes"] for d in per_doc) / 1e6
+    pages = sum(d["pages"] for d in per_doc)
+    return {
+        "extractor": name, "settings": extractors.settings(name), "docs": len(per_doc), "pages": pages,
+        "mb": round(mb, 3), "seconds": round(secs, 3),
+        "pages_per_s": round(pages / secs, 2), "mb_per_s": round(mb / secs, 3),
+        "empty_pages": sum(d["empty_pages"] for d in per_doc),
+        "failed": sum(d["error"] is not None for d in per_doc),
+        "per_doc": per_doc, "_texts": texts,
+    }
+
+def add_agreement(results: list, reference: str):
+    ref = next((r for r in results if r["extractor"] == reference), None)
+    for r in results:
+        if ref is None:
+            r["agreement"] = None
+            continue
+        for d in r["per_doc"]:
+            d["agreement"] = round(token_f1(r["_texts"][d["file"]], ref["_texts"][d["file"]]), 4)
+        scores = [d["agreement"] for d in r["per_doc"]]
+        r["agreement"] = round(sum(scores) / len(scores), 4) if scores else None
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Compare PDF text extractors over local fixtures.")
+    ap.add_argument("fixtures", type=pathlib.Path, help="directory of *.pdf files")
+    ap.add_argument("--extractors", default=",".join(extractors.EXTRACTORS),
+                    help="comma-separated extractors to run (default: all available)")
+    ap.add_argument("--reference", default="pdftotext",
+                    help="extractor the others are compared with (default pdftotext, else the first one run)")
+    ap.add_argument("--jobs", type=int, default=extractors.OCR_WORKERS)
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    pdfs = sorted(args.fixtures.glob("*.pdf"))
+    if not pdfs:
+        print(f"ERROR: no PDFs in {args.fixtures}", file=sys.stderr)
+        sys.exit(1)
+    names = [n.strip() for n in args.extractors.split(",") if n.strip()]
+    unknown = [n for n in names if n not in extractors.EXTRACTORS]
+    if unknown:
+        print(f"ERROR: unknown extractor(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(2)
+    skipped = [n for n in names if not extractors.EXTRACTORS[n].available()]
+    for n in skipped:
+        print(f"[bench] {n} not available, skipped", file=sys.stderr)
+
+    results = [run_extractor(n, pdfs, args.jobs) for n in names if n not in skipped]
+    reference = args.reference
+    if results and reference not in [r["extractor"] for r in results]:
+        reference = results[0]["extractor"]
+        print(f"[bench] reference {args.reference} did not run, comparing with {reference}", file=sys.stderr)
+    add_agreement(results, reference)
+    for r in results:
+        del r["_texts"]
+
+    if args.json:
+        print(json.dumps({"fixtures": str(args.fixtures), "reference": reference, "results": results},
+                         ensure_ascii=False, indent=2))
+        return
+    print(f"{len(pdfs)} PDFs in {args.fixtures}; agreement = token F1 vs {reference}")
+    print(f"{'extractor':<13} {'docs':>5} {'pages':>6} {'MB':>8} {'s':>8} {'pages/s':>9} {'MB/s':>8} {'empty':>6} "
+          f"{'agree':>6} {'slowest page':>12}")
+    for r in results:
+        agree = "-" if r["agreement"] is None else f"{r['agreement']:.3f}"
+        page_s = [s for d in r["per_doc"] for s in d["page_s"] or ()]
+        slowest = f"{max(page_s):.3f}s" if page_s else "-"
+        print(f"{r['extractor']:<13} {r['docs']:>5} {r['pages']:>6} {r['mb']:>8.2f} {r['seconds']:>8.2f} "
+              f"{r['pages_per_s']:>9.1f} {r['mb_per_s']:>8.2f} {r['empty_pages']:>6} {agree:>6} {slowest:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+PDF text extractors shared by build_fulltext.py and scripts/extract_bench.py.
+
+Every extractor returns a document as a list of page texts:
+  pdftotext  poppler's pdftotext -layout (default)
+  pdfminer   pdfminer.six, pure Python (optional dependency)
+  pdfminer-fast  pdfminer.six with simplified layout analysis (LAParams(boxes_flow=None):
+             lines and text boxes are still found, but boxes are kept in page
+             order instead of being re-ordered by the costly clustering pass)
+  ocr        pdftoppm + Tesseract on every page, for scanned corpora
+
+extract() runs a chain of extractors and keeps the first one that yields any
+text ("auto" = pdftotext, then pdfminer when pdftotext is missing or returns
+nothing). The text-layer extractors then get a per-page OCR fallback: pages
+with fewer than MIN_PAGE_CHARS characters are rendered and OCR'd in parallel,
+and the OCR text replaces the page when it is longer; when no extractor could
+read the document at all, every page (pdfinfo's page count) is OCR'd. OCR results,
+including those of the ocr extractor, are cached in .cache/ocr/ (PACM_OCR_CACHE),
+keyed by (PDF SHA-256, page number, OCR language).
+
+OCR runs in the document's language: OCR_LANGS maps the catalogue's language codes
+to Tesseract languages (English uses PACM_OCR_LANG, default "eng"), and every OCR
+function takes the Tesseract language as lang.
+
+pdfminer's layout analysis is CPU-bound, so the pdfminer extractors split long
+documents into page ranges (at least PDFMINER_PAGES_PER_TASK pages each) and
+extract them on a pool of worker processes, reassembling the pages in order;
+documents shorter than two ranges, or with workers=1, run in-process.
+
+settings(name) describes an extractor's output; build_fulltext.py stores it in
+every record so a change of extractor or OCR settings triggers re-extraction.
+Without pdftoppm and tesseract the page fallback cannot run and the settings say
+"ocr=none", so those records are re-extracted once the OCR tools are installed.
+
+extract(..., stats={}) also fills stats with what happened: every extractor
+tried (seconds, characters, error, and "page_s", the seconds per page, for
+extractors that work page by page), the pages and characters kept, how many
+pages were sparse, how many were OCR'd and how long OCR took. build_fulltext.py
+puts it in the build report.
+
+Text is capped at MAX_TEXT_CHARS characters per document (PACM_MAX_TEXT_CHARS,
+default 20 million): extract() cuts the pages there and sets stats["truncated"].
+pdftotext writes to a pipe that is read incrementally and killed once the cap is
+passed, so neither a temporary text file nor the text of a runaway document is
+ever held whole.
+"""
+import os, re, time, codecs, pathlib, shutil, tempfile, subprocess
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+MIN_PAGE_CHARS = 80
+OCR_LANG = os.environ.get("PACM_OCR_LANG") or "eng"  # workflows may set it to ""
+OCR_LANGS = {"en": OCR_LANG, "fr": "fra", "es": "spa", "ar": "ara", "zh": "chi_sim", "ru": "rus"}
+OCR_DPI = 300
+OCR_CACHE = pathlib.Path(os.environ.get("PACM_OCR_CACHE", ROOT / ".cache" / "ocr"))
+OCR_WORKERS = int(os.environ.get("PACM_OCR_JOBS", os.cpu_count() or 1))
+PAGES_RE = re.compile(r"^Pages:\s+(\d+)", re.M)
+PDFMINER_PAGES_PER_TASK = 8
+MAX_TEXT_CHARS = int(os.environ.get("PACM_MAX_TEXT_CHARS", 20_000_000))
+PIPE_CHUNK = 1 << 16
+
+class ExtractionError(Exception):
+    """An extractor could not read a PDF; the message says why."""
+
+def have_cmd(cmd: str) -> bool:
+    return shutil.which(cmd) is not None
+
+def split_pages(text: str) -> list:
+    pages = text.split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()  # pdftotext and pdfminer end every page, including the last, with \f
+    return pages
+
+class Extractor:
+    """name: CLI/registry key; settings: description stored with extracted records."""
+    name = ""
+    settings = ""
+
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    def pages(self, pdf_path: pathlib.Path, workers: int = 1, lang: str = OCR_LANG, timings: list = None,
+              digest: str = None) -> list:
+        """Page texts of pdf_path; raises ExtractionError on failure. Scratch files go next to pdf_path.
+        lang is the Tesseract language, for extractors that OCR; timings, if given, gets the
+        seconds spent on each page from extractors that work page by page; digest, the PDF's
+        SHA-256, lets OCR use the page cache."""
+        raise NotImplementedError
+
+class Pdftotext(Extractor):
+    name = "pdftotext"
+    settings = "pdftotext -layout"
+
+    def available(self):
+        return have_cmd("pdftotext")
+
+    def pages(self, pdf_path, workers=1, lang=OCR_LANG, timings=None, digest=None):
+        # stderr goes to a file: a PDF with thousands of syntax warnings would fill a pipe nobody reads
+        with tempfile.TemporaryFile() as errf:
+            try:
+                proc = subprocess.Popen(["pdftotext", "-layout", str(pdf_path), "-"],
+                                        stdout=subprocess.PIPE, stderr=errf)
+            except OSError as e:
+                raise ExtractionError(f"pdftotext: {e}") from e
+            with proc:
+                text, capped = read_capped(proc.stdout, MAX_TEXT_CHARS)
+                if capped:
+                    proc.kill()
+                code = proc.wait()
+            if code and not capped:
+                errf.seek(0)
+                err = errf.read().decode("utf-8", errors="ignore").strip().splitlines()
+                raise ExtractionError(f"pdftotext exit {code}" + (f": {err[-1]}" if err else ""))
+        return split_pages(text)
+
+def read_capped(stream, limit: int) -> tuple:
+    """(text, capped): stream decoded as UTF-8 until it ends or more than limit characters
+    (form feeds not counted) have been read. extract() trims the excess; memory stays at about limit."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parts, n = [], 0
+    for chunk in iter(lambda: stream.read(PIPE_CHUNK), b""):
+        part = decoder.decode(chunk)
+        parts.append(part)
+        n += len(part) - part.count("\f")
+        if n > limit:
+            return "".join(parts), True
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts), False
+
+def cap_pages(pages: list, limit: int) -> tuple:
+    """(pages, truncated): pages cut so their characters total at most limit; pages past the cut are dropped."""
+    out, n = [], 0
+    for p in pages:
+        if n + len(p) > limit:
+            out.append(p[:limit - n])
+            return out, True
+        out.append(p)
+        n += len(p)
+    return out, False
+
+def pdfminer_page_count(pdf_path: pathlib.Path) -> int:
+    """Number of pages from the PDF's page tree, or 0 if it cannot be read."""
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdftypes import resolve1
+    try:
+        with open(pdf_path, "rb") as f:
+            return int(resolve1(resolve1(PDFDocument(PDFParser(f)).catalog["Pages"])["Count"]))
+    except Exception:
+        return 0
+
+def pdfminer_range(pdf_path: str, first: int, last: int, laparams: dict) -> list:
+    """[(text, seconds)] for the 0-based pages first..last-1 (last=None: to the end).
+    The page texts are what pdfminer's extract_text() gives for them. Safe in a worker process."""
+    from io import StringIO
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+    params = LAParams(**laparams)
+    rsrc = PDFResourceManager(caching=True)
+    out = []
+    try:
+        with open(pdf_path, "rb") as f:
+            wanted = range(first, last) if last is not None else None
+            for page in PDFPage.get_pages(f, pagenos=wanted):
+                t = time.perf_counter()
+                buf = StringIO()
+                device = TextConverter(rsrc, buf, laparams=params)
+                PDFPageInterpreter(rsrc, device).process_page(page)
+                device.close()
+                out.append((buf.getvalue().removesuffix("\f"), time.perf_counter() - t))
+                if wanted is not None and len(out) == len(wanted):
+                    break
+    except Exception as e:
+        raise ExtractionError(f"pdfminer: {type(e).__name__}: {e}") from e
+    return out
+
+def page_ranges(n: int, workers: int) -> list:
+    """[(first, last)] covering pages 0..n-1: about two ranges per worker, none shorter than
+    PDFMINER_PAGES_PER_TASK; one range (None = to the end) when splitting would not pay."""
+    if workers <= 1 or n < 2 * PDFMINER_PAGES_PER_TASK:
+        return [(0, None)]
+    size = max(PDFMINER_PAGES_PER_TASK, -(-n // (2 * workers)))
+    return [(i, min(i + size, n)) for i in range(0, n, size)]
+
+class Pdfminer(Extractor):
+    name = "pdfminer"
+    settings = "pdfminer"
+    laparams = {}
+
+    def available(self):
+        try:
+            import pdfminer.high_level  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def pages(self, pdf_path, workers=1, lang=OCR_LANG, timings=None, digest=None):
+        ranges = page_ranges(pdfminer_page_count(pdf_path), workers)
+        if len(ranges) == 1:
+            parts = [pdfminer_range(str(pdf_path), *ranges[0], self.laparams)]
+        else:
+            firsts, lasts = zip(*ranges)
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+                    parts = list(pool.map(pdfminer_range, repeat(str(pdf_path)), firsts, lasts, repeat(self.laparams)))
+            except BrokenExecutor as e:
+                raise ExtractionError(f"pdfminer: worker died: {e}") from e
+        pages = [p for part in parts for p in part]
+        if timings is not None:
+            timings.extend(secs for _, secs in pages)
+        return [text for text, _ in pages]
+
+class PdfminerFast(Pdfminer):
+    name = "pdfminer-fast"
+    settings = "pdfminer boxes_flow=None"
+    laparams = {"boxes_flow": None}
+
+class Ocr(Extractor):
+    name = "ocr"
+    settings = "tesseract"
+
+    def available(self):
+        return all(have_cmd(c) for c in ("pdfinfo", "pdftoppm", "tesseract"))
+
+    def pages(self, pdf_path, workers=1, lang=OCR_LANG, timings=None, digest=None):
+        n = page_count(pdf_path)
+        if not n:
+            raise ExtractionError("pdfinfo: could not read the page count")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            if digest:
+                return list(pool.map(lambda p: ocr_page_cached(pdf_path, digest, p, lang), range(1, n + 1)))
+            return list(pool.map(lambda p: run_ocr_page(pdf_path, p, lang), range(1, n + 1)))
+
+EXTRACTORS = {e.name: e for e in (Pdftotext(), Pdfminer(), PdfminerFast(), Ocr())}
+CHAINS = {"auto": ("pdftotext", "pdfminer"), **{name: (name,) for name in EXTRACTORS}}
+
+def ocr_available() -> bool:
+    """Whether sparse pages can be OCR'd here (pdftoppm and tesseract installed)."""
+    return have_cmd("pdftoppm") and have_cmd("tesseract")
+
+def settings(name: str, lang: str = OCR_LANG) -> str:
+    ext = EXTRACTORS[name]
+    if name == "ocr":
+        return f"{ext.settings} {lang}@{OCR_DPI}"
+    ocr = f"{lang}@{OCR_DPI}" if ocr_available() else "none"
+    return f"{ext.settings};ocr={ocr};page-min={MIN_PAGE_CHARS}"
+
+def page_count(pdf_path: pathlib.Path) -> int:
+    try:
+        r = subprocess.run(["pdfinfo", str(pdf_path)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except Exception:
+        return 0
+    m = PAGES_RE.search(r.stdout.decode("utf-8", errors="ignore"))
+    return int(m.group(1)) if m else 0
+
+def run_ocr_page(pdf_path: pathlib.Path, page: int, lang: str = OCR_LANG) -> str:
+    """Render one page and OCR it with Tesseract; returns "" on failure."""
+    stem = pdf_path.parent / f"ocr-p{page:04d}"
+    png = stem.with_suffix(".png")
+    try:
+        subprocess.run(
+            ["pdftoppm", "-f", str(page), "-l", str(page), "-r", str(OCR_DPI), "-gray", "-png",
+             "-singlefile", str(pdf_path), str(stem)],
+            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        r = subprocess.run(
+            ["tesseract", str(png), "stdout", "-l", lang],
+            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            env={**os.environ, "OMP_THREAD_LIMIT": "1"}
+        )
+        text = r.stdout.decode("utf-8", errors="ignore").rstrip("\f").rstrip()
+        return text + "\n" if text else ""
+    except Exception:
+        return ""
+    finally:
+        png.unlink(missing_ok=True)
+
+def ocr_page_cached(pdf_path: pathlib.Path, digest: str, page: int, lang: str = OCR_LANG) -> str:
+    path = OCR_CACHE / digest[:2] / digest / f"{page:04d}.{lang}.txt"
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    text = run_ocr_page(pdf_path, page, lang)
+    if text.strip():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    return text
+
+def ocr_sparse_pages(pdf_path: pathlib.Path, digest: str, pages: list, workers: int, stats: dict = None,
+                     lang: str = OCR_LANG) -> list:
+    """OCR only the pages with too little text, in parallel, keeping whichever text is longer."""
+    stats = {} if stats is None else stats
+    sparse = [n for n, t in enumerate(pages, 1) if len(t.strip()) < MIN_PAGE_CHARS]
+    stats.update(sparse_pages=len(sparse), ocr_pages=0, ocr_used=0, ocr_s=0.0)
+    if not sparse or not ocr_available():
+        return pages
+    pages = list(pages)
+    t = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for n, text in zip(sparse, pool.map(lambda n: ocr_page_cached(pdf_path, digest, n, lang), sparse)):
+            if len(text.strip()) > len(pages[n - 1].strip()):
+                pages[n - 1] = text
+                stats["ocr_used"] += 1
+    stats.update(ocr_pages=len(sparse), ocr_s=round(time.perf_counter() - t, 4))
+    return pages
+
+def extract(pdf_path: pathlib.Path, digest: str, chain=CHAINS["auto"], ocr_workers: int = OCR_WORKERS,
+            stats: dict = None, lang: str = OCR_LANG):
+    """(extractor name, text with pages joined by form feeds). Safe in a worker process.
+    stats, if given, is filled with {extractor, attempts, pages, chars, sparse_pages, ocr_pages, ocr_used, ocr_s}."""
+    stats = {} if stats is None else stats
+    names = [n for n in chain if EXTRACTORS[n].available()] or list(chain[:1])
+    name, pages, attempts = names[0], [], []
+    for i, n in enumerate(names):
+        t, timings = time.perf_counter(), []
+        try:
+            got, error = EXTRACTORS[n].pages(pdf_path, ocr_workers, lang, timings, digest), None
+        except ExtractionError as e:
+            got, error = [], str(e)
+        attempts.append({"extractor": n, "seconds": round(time.perf_counter() - t, 4),
+                         "chars": sum(len(p) for p in got), "error": error})
+        if timings:
+            attempts[-1]["page_s"] = [round(s, 4) for s in timings]
+        has_text = any(p.strip() for p in got)
+        if i == 0 or has_text:
+            name, pages = n, got
+        if has_text:
+            break
+    if name != "ocr":
+        if not pages:
+            # no text layer could be read at all: every page is sparse, so the whole document is OCR'd
+            pages = [""] * page_count(pdf_path)
+        pages = ocr_sparse_pages(pdf_path, digest, pages, ocr_workers, stats, lang)
+    else:
+        stats.update(sparse_pages=0, ocr_pages=len(pages), ocr_used=len(pages), ocr_s=attempts[-1]["seconds"])
+    pages, stats["truncated"] = cap_pages(pages, MAX_TEXT_CHARS)
+    stats.update(extractor=name, attempts=attempts, pages=len(pages), chars=sum(len(p) for p in pages))
+    return name, "\f".join(pages)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the PACM scripts (scraper, build_fulltext, build_index).
+
+- One pooled keep-alive requests.Session for every download.
+- On-disk cache in .cache/http/ (override with PACM_HTTP_CACHE): each URL is
+  stored as <sha256>.body plus <sha256>.json holding ETag / Last-Modified.
+  Later requests send If-None-Match / If-Modified-Since and a 304 is served
+  from disk.
+- Cache-only mode (PACM_HTTP_OFFLINE=1 or set_offline()): never touch the
+  network, raise CacheMiss for anything not cached yet.
+- canonical_url(): one key per physical document. Fragments (#page=25,
+  #5CMA6) are dropped, scheme/host lowercased, default ports and tracking
+  parameters removed, query parameters sorted and symbol-search values
+  (documents?symbol=...) stripped of whitespace and trailing slashes. The cache
+  is keyed by the canonical URL, so catalogue rows that differ only in those
+  details share one download.
+- Bodies are streamed to disk in CHUNK-sized pieces, never held in memory.
+  fetch_to_cache(..., max_bytes=, expect="pdf") refuses a response before it
+  is cached: a Content-Length over the cap, a textual Content-Type (an HTML
+  error or login page), a body that does not start with the PDF header within
+  its first kilobyte, or a body that outgrows the cap while streaming. The
+  partial file is removed and Rejected says why. MAX_BYTES (PACM_MAX_DOWNLOAD_MB,
+  default 200) is the default cap.
+"""
+import json, os, re, hashlib, pathlib, threading, shutil
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CACHE_DIR = pathlib.Path(os.environ.get("PACM_HTTP_CACHE", ROOT / ".cache" / "http"))
+OFFLINE = os.environ.get("PACM_HTTP_OFFLINE", "") not in ("", "0")
+
+TIMEOUT = 60
+CHUNK = 1 << 16
+MAX_BYTES = int(os.environ.get("PACM_MAX_DOWNLOAD_MB", "200")) << 20
+PDF_MAGIC = b"%PDF-"
+MAGIC_WINDOW = 1024   # readers accept the PDF header anywhere in the first kilobyte
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+TRACKING_PARAMS = re.compile(r"utm_\w+|fbclid|gclid", re.I)
+
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "PACM-catalogue/1.7 (+github actions)"})
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+class CacheMiss(Exception):
+    """Raised in cache-only mode when a URL has never been downloaded."""
+
+class Rejected(Exception):
+    """A response (or cached body) was refused: too large or not the expected type. Retrying will not help."""
+
+def set_offline(flag: bool = True):
+    global OFFLINE
+    OFFLINE = flag
+
+def canonical_url(url: str) -> str:
+    """The URL of the physical document behind url (see module docstring)."""
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host, _, port = parts.netloc.lower().partition(":")
+    netloc = host if port in ("", DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    query = []
+    for k, v in parse_qsl(parts.query, keep_blank_values=True):
+        if TRACKING_PARAMS.fullmatch(k):
+            continue
+        if k.lower() == "symbol":
+            v = re.sub(r"\s+", "", v).rstrip("/")
+        query.append((k, v))
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(sorted(query), safe="/"), ""))
+
+def _paths(url: str):
+    key = hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.body", CACHE_DIR / f"{key}.json"
+
+def _atomic_write(path: pathlib.Path, data: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def load_meta(url: str):
+    body, meta_path = _paths(url)
+    if not (body.exists() and meta_path.exists()):
+        return None
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+def check_head(head: bytes, expect: str = None):
+    """Raise Rejected unless head, the first bytes of a body, looks like an expect ("pdf") document."""
+    if expect == "pdf" and PDF_MAGIC not in head[:MAGIC_WINDOW]:
+        start = head[:16].decode("latin-1").strip()
+        raise Rejected(f"not a PDF (starts with {start!r})" if start else "not a PDF (empty body)")
+
+def check_cached(body: pathlib.Path, max_bytes: int = None, expect: str = None) -> pathlib.Path:
+    """Apply the size and type checks to an already cached body (cached before they existed, or by
+    a caller without them)."""
+    size = body.stat().st_size
+    if max_bytes and size > max_bytes:
+        raise Rejected(f"too large ({size} bytes, limit {max_bytes})")
+    if expect:
+        with open(body, "rb") as f:
+            check_head(f.read(MAGIC_WINDOW), expect)
+    return body
+
+def check_headers(r, max_bytes: int = None, expect: str = None):
+    """Refuse a response from its headers alone, before any of the body is read."""
+    length = r.headers.get("Content-Length", "")
+    if max_bytes and length.isdigit() and int(length) > max_bytes:
+        raise Rejected(f"too large (Content-Length {length}, limit {max_bytes})")
+    ctype = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if expect == "pdf" and (ctype.startswith("text/") or ctype.endswith(("/html", "/xhtml+xml", "/json"))):
+        raise Rejected(f"not a PDF (Content-Type {ctype})")
+
+def stream_body(r, tmp: pathlib.Path, max_bytes: int = None, expect: str = None):
+    """Write r's body to tmp CHUNK by CHUNK, checking the head once MAGIC_WINDOW bytes (or all) are in
+    and the size as it grows; memory stays at one chunk whatever the body's size."""
+    head, size = b"", 0
+    with open(tmp, "wb") as f:
+        for chunk in r.iter_content(CHUNK):
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise Rejected(f"too large (over {max_bytes} bytes)")
+            if len(head) < MAGIC_WINDOW:
+                head += chunk[:MAGIC_WINDOW - len(head)]
+                if len(head) >= MAGIC_WINDOW:
+                    check_head(head, expect)
+            f.write(chunk)
+    if len(head) < MAGIC_WINDOW:
+        check_head(head, expect)
+
+def fetch_to_cache(url: str, timeout=TIMEOUT, max_bytes: int = None, expect: str = None) -> pathlib.Path:
+    """Return the path of an up-to-date cached body for url, revalidating unless offline.
+    max_bytes and expect ("pdf") refuse the body with Rejected (see module docstring)."""
+    body, meta_path = _paths(url)
+    meta = load_meta(url)
+    if OFFLINE:
+        if meta is None:
+            raise CacheMiss(url)
+        return check_cached(body, max_bytes, expect)
+
+    headers = {}
+    if meta:
+        if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+
+    with SESSION.get(canonical_url(url), headers=headers, timeout=timeout, stream=True) as r:
+        if r.status_code == 304 and meta is not None:
+            return check_cached(body, max_bytes, expect)
+        r.raise_for_status()
+        check_headers(r, max_bytes, expect)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = body.with_name(f"{body.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            stream_body(r, tmp, max_bytes, expect)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        os.replace(tmp, body)
+        meta = {
+            "url": canonical_url(url),
+            "etag": r.headers.get("ETag", ""),
+            "last_modified": r.headers.get("Last-Modified", ""),
+            "content_type": r.headers.get("Content-Type", ""),
+            "encoding": r.encoding or "utf-8",
+        }
+        _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    return body
+
+def get_bytes(url: str, timeout=TIMEOUT) -> bytes:
+    return fetch_to_cache(url, timeout).read_bytes()
+
+def get_text(url: str, timeout=TIMEOUT) -> str:
+    path = fetch_to_cache(url, timeout)
+    enc = (load_meta(url) or {}).get("encoding") or "utf-8"
+    return path.read_bytes().decode(enc, errors="replace")
+
+def download(url: str, dest: pathlib.Path, timeout=TIMEOUT, max_bytes: int = None, expect: str = None) -> pathlib.Path:
+    """Copy the (possibly cached) body of url to dest; max_bytes and expect as for fetch_to_cache."""
+    shutil.copyfile(fetch_to_cache(url, timeout, max_bytes, expect), dest)
+    return dest
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Writes the cache-friendly site artefacts from data/search_index.json.
+
+Writes: data/text/<hash>.json               {"paras": [...], "pages": [...], "text": ...[, "lc": ...]} for one document
+        data/pages/<hash>.<n>.json          {"text": ...} for page n of it (--page-chunks)
+        data/postings/<key>.<hash>.json     term -> postings shard (scripts/postings.py)
+        data/manifest.json                  {version, lang, languages, tokenizer, normalized, docs:[{url,title,
+                                             symbol,section,subsection[,row_url][,aliases],chars,
+                                             file:"text/<hash>.json"[,ptok][,chunks:"pages/<hash>"]}],
+                                             postings:{key:"postings/<key>.<hash>.json"}}
+        data/manifest.<lang>.json           the same for the documents in another language
+                                             (postings/<lang>.<key>.<hash>.json)
+
+Records are split by language ("lang", English when absent): each language gets
+its own manifest and postings shards, so the site downloads only the shard for
+the language it searches. Every manifest lists all of them as
+languages: {code: {manifest, docs}}. Non-English docs carry row_url, the url of
+the catalogue row they translate.
+
+Pages: "ptok" is the token position at which each page starts (postings.page_tokens),
+so the client turns postings positions into page numbers (page n holds positions
+ptok[n-1] .. ptok[n]-1) without fetching any text. With page chunks, "chunks" is
+the prefix of one file per page ("<chunks>.<n>.json", n from 1, named after the
+document's text hash), so a snippet needs only the pages that match.
+
+Shard filenames carry a hash of their content, so browsers can cache them
+forever; only the manifests are revalidated. A rebuild that changes one document
+changes one text file and the postings shards it touches. Files no longer named
+by the manifest are deleted after the new manifest is in place.
+
+build_fulltext.py calls build_manifest() after each build; run this script to
+regenerate the artefacts from an existing index.
+
+Usage: manifest.py [--page-chunks]
+"""
+import json, os, sys, pathlib, hashlib, argparse
+from collections import defaultdict
+import postings
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / 'data'
+INDEX = DATA / 'search_index.json'
+MANIFEST = DATA / 'manifest.json'
+TEXT_DIR = DATA / 'text'
+POSTINGS_DIR = DATA / 'postings'
+PAGES_DIR = DATA / 'pages'
+
+VERSION = 5
+DEFAULT_LANG = "en"
+META_KEYS = ("url", "title", "symbol", "section", "subsection")
+
+def compact(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def write_hashed(dirpath: pathlib.Path, stem: str, data: bytes) -> pathlib.Path:
+    """Write data as <stem>.<hash>.json (or <hash>.json) unless that file already exists."""
+    h = hashlib.sha256(data).hexdigest()[:16]
+    path = dirpath / (f"{stem}.{h}.json" if stem else f"{h}.json")
+    if not path.exists():
+        dirpath.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return path
+
+def manifest_name(lang: str) -> str:
+    return MANIFEST.name if lang == DEFAULT_LANG else f"{MANIFEST.stem}.{lang}.json"
+
+def write_pages(pages_dir: pathlib.Path, stem: str, text: str, starts: list) -> list:
+    """One {"text": ...} file per page, <stem>.<n>.json; returns their names."""
+    names = []
+    for n, (a, b) in enumerate(zip(starts, list(starts[1:]) + [len(text)]), 1):
+        path = pages_dir / f"{stem}.{n}.json"
+        if not path.exists():
+            pages_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(compact({"text": text[a:b].strip()}))
+            os.replace(tmp, path)
+        names.append(path)
+    return names
+
+def build_manifest(index_path: pathlib.Path = INDEX, data_dir: pathlib.Path = DATA, page_chunks: bool = False) -> dict:
+    """Write one manifest per language (plus the shared text, page and postings shards); returns the default one."""
+    text_dir, postings_dir, pages_dir = data_dir / TEXT_DIR.name, data_dir / POSTINGS_DIR.name, data_dir / PAGES_DIR.name
+    live = set()
+    by_lang = {DEFAULT_LANG: {"docs": [], "terms": defaultdict(list), "normalized": True}}
+    for rec in postings.iter_records(index_path):
+        lang = rec.get("lang") or DEFAULT_LANG
+        part = by_lang.setdefault(lang, {"docs": [], "terms": defaultdict(list), "normalized": True})
+        text = rec.get("text", "")
+        body = {k: rec[k] for k in ("paras", "pages", "text", "lc") if k in rec}
+        path = write_hashed(text_dir, "", compact(body))
+        doc = {k: rec.get(k, "") for k in META_KEYS}
+        if rec.get("row_url"):
+            doc["row_url"] = rec["row_url"]
+        if rec.get("aliases"):
+            doc["aliases"] = rec["aliases"]
+        part["normalized"] = part["normalized"] and "paras" in rec
+        doc.update(chars=len(text), file=path.relative_to(data_dir).as_posix())
+        if rec.get("pages"):
+            doc["ptok"] = postings.page_tokens(text, rec["pages"])
+            if page_chunks:
+                chunks = write_pages(pages_dir, path.stem, text, rec["pages"])
+                live |= {c.relative_to(data_dir).as_posix() for c in chunks}
+                doc["chunks"] = (pages_dir / path.stem).relative_to(data_dir).as_posix()
+        postings.add_postings(part["terms"], len(part["docs"]), text)
+        part["docs"].append(doc)
+
+    languages = {lang: {"manifest": manifest_name(lang), "docs": len(part["docs"])}
+                 for lang, part in sorted(by_lang.items())}
+    manifests = {}
+    for lang, part in by_lang.items():
+        prefix = "" if lang == DEFAULT_LANG else f"{lang}."
+        shard_files = {key: write_hashed(postings_dir, prefix + key, compact(shard)).relative_to(data_dir).as_posix()
+                       for key, shard in postings.shard_postings(part["terms"]).items()}
+        manifests[lang] = {"version": VERSION, "lang": lang, "languages": languages,
+                           "tokenizer": postings.TOKEN_RE.pattern, "normalized": part["normalized"],
+                           "docs": part["docs"], "postings": dict(sorted(shard_files.items()))}
+        live |= {d["file"] for d in part["docs"]} | set(shard_files.values())
+    for lang, manifest in manifests.items():
+        tmp = data_dir / (manifest_name(lang) + ".tmp")
+        tmp.write_bytes(compact(manifest))
+        os.replace(tmp, data_dir / manifest_name(lang))
+
+    for f in data_dir.glob(f"{MANIFEST.stem}.*.json"):
+        if f.name not in {manifest_name(lang) for lang in manifests}:
+            f.unlink()  # a language no longer in the index
+    for d in (text_dir, postings_dir, pages_dir):
+        for f in d.glob("*.json") if d.exists() else ():
+            if f.relative_to(data_dir).as_posix() not in live:
+                f.unlink()
+    return manifests[DEFAULT_LANG]
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Write the manifests and shards for the site from data/search_index.json.")
+    ap.add_argument("--page-chunks", action="store_true", help="also write every page as its own text shard")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not INDEX.exists():
+        print(f"ERROR: {INDEX} not found", file=sys.stderr)
+        sys.exit(1)
+    m = build_manifest(page_chunks=args.page_chunks)
+    print(f"Wrote {MANIFEST} ({len(m['docs'])} text shards, {len(m['postings'])} postings shards)"
+          + "".join(f", {v['manifest']} ({v['docs']} docs)" for k, v in m["languages"].items() if k != DEFAULT_LANG))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Runs the whole data pipeline as a stage graph, skipping stages whose inputs
+have not changed since their last successful run.
+
+Stages (inputs -> outputs):
+  fetch-page       network                      -> .cache/pipeline/rules.html   (always runs, conditional GET)
+  scrape           rules.html, scraper code     -> data/a64_catalogue.json      (scrape + preserve manual fields)
+  merge-meetings   catalogue, data/meetings.json -> data/a64_catalogue.json
+  cleanup          catalogue                    -> data/a64_catalogue.json
+  versions         catalogue (history URLs)     -> data/a64_catalogue.json, data/version_history.json
+                                                   (version, superseded; version_history.py)
+  validate         catalogue                    -> (report only)                (check_counts.py)
+  build-view       catalogue                    -> data/catalogue_view.json, index.html (table pre-rendered)
+  build-fulltext   catalogue, extractor code    -> data/search_index.json, data/manifest.json
+
+A stage's inputs and outputs are hashed (SHA-256) and stored in
+.cache/pipeline/state.json; the next run skips the stage when every one of them
+still has the recorded hash. Hashes are taken again once the whole run is over,
+so stages that rewrite the catalogue in place (scrape, merge-meetings, cleanup)
+only run again when something changed it since, and when the fetched page is
+byte-identical to the last run nothing downstream runs at all.
+Stages whose dependencies are done run concurrently (--jobs threads); each stage
+runs its scripts as subprocesses from the repository root.
+
+Usage: pipeline.py [--force] [--only STAGE ...] [--dry-run] [--offline] [--jobs N]
+"""
+import json, os, sys, time, shutil, hashlib, pathlib, argparse, subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+STATE_DIR = pathlib.Path(os.environ.get("PACM_PIPELINE_STATE", ROOT / ".cache" / "pipeline"))
+STATE = STATE_DIR / "state.json"
+PAGE = STATE_DIR / "rules.html"
+OLD_CATALOGUE = STATE_DIR / "old_catalogue.json"
+CAT = "data/a64_catalogue.json"
+
+class Stage:
+    def __init__(self, name, run, inputs=(), outputs=(), deps=(), always=False):
+        self.name, self.run, self.deps, self.always = name, run, tuple(deps), always
+        self.inputs, self.outputs = tuple(inputs), tuple(outputs)
+
+def py(script, *args):
+    return [sys.executable, str(SCRIPTS / script), *args]
+
+def sh(cmd):
+    subprocess.run(cmd, cwd=ROOT, check=True)
+
+def sha256_file(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(paths) -> dict:
+    """{path: sha256 or None if missing} for files relative to the repository root."""
+    out = {}
+    for p in paths:
+        f = ROOT / p
+        out[str(p)] = sha256_file(f) if f.is_file() else None
+    return out
+
+def fetch_page(args):
+    import http_cache, scrape_current_versions
+    if args.offline:
+        http_cache.set_offline()
+    html = http_cache.get_text(scrape_current_versions.URL, timeout=scrape_current_versions.TIMEOUT)
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    if not PAGE.exists() or PAGE.read_text(encoding="utf-8") != html:
+        tmp = PAGE.with_name(PAGE.name + ".tmp")
+        tmp.write_text(html, encoding="utf-8")
+        os.replace(tmp, PAGE)
+
+def scrape(args):
+    cat = ROOT / CAT
+    if cat.exists():
+        shutil.copyfile(cat, OLD_CATALOGUE)
+    else:
+        OLD_CATALOGUE.write_text("[]", encoding="utf-8")
+    sh(py("scrape_current_versions.py", "--html", str(PAGE)))
+    sh(py("catalogue.py", "--preserve", str(OLD_CATALOGUE)))
+
+def versions(args):
+    sh(py("version_history.py", *(["--offline"] if args.offline else [])))
+
+def build_fulltext(args):
+    sh(py("build_fulltext.py", "--jobs", str(os.cpu_count() or 1), "--page-chunks", *(["--offline"] if args.offline else [])))
+
+CATALOGUE_CODE = ["scripts/catalogue.py"]
+STAGES = [
+    Stage("fetch-page", fetch_page, outputs=[PAGE], always=True),
+    Stage("scrape", scrape, deps=["fetch-page"],
+          inputs=[PAGE, "scripts/scrape_current_versions.py", *CATALOGUE_CODE], outputs=[CAT]),
+    Stage("merge-meetings", lambda args: sh(py("merge_meetings.py")), deps=["scrape"],
+          inputs=[CAT, "data/meetings.json", "scripts/merge_meetings.py", *CATALOGUE_CODE], outputs=[CAT]),
+    Stage("cleanup", lambda args: sh(py("cleanup_meeting_subsections.py")), deps=["merge-meetings"],
+          inputs=[CAT, "scripts/cleanup_meeting_subsections.py", *CATALOGUE_CODE], outputs=[CAT]),
+    Stage("versions", versions, deps=["cleanup"],
+          inputs=[CAT, "scripts/version_history.py", *CATALOGUE_CODE], outputs=[CAT, "data/version_history.json"]),
+    # after versions, which rewrites the catalogue: validate checks (and records the hash of) the final one
+    Stage("validate", lambda args: sh(py("check_counts.py")), deps=["versions"],
+          inputs=[CAT, "scripts/check_counts.py", *CATALOGUE_CODE]),
+    Stage("build-view", lambda args: sh(py("build_view.py")), deps=["versions"],
+          inputs=[CAT, "scripts/build_view.py"], outputs=["data/catalogue_view.json", "index.html"]),
+    Stage("build-fulltext", build_fulltext, deps=["versions"],
+          inputs=[CAT] + [f"scripts/{s}" for s in ("build_fulltext.py", "build_report.py", "extractors.py",
+                                                   "http_cache.py", "postings.py", "manifest.py", "corpus_store.py")]
+                 + CATALOGUE_CODE,
+          outputs=["data/search_index.json", "data/manifest.json"]),
+]
+
+def load_state() -> dict:
+    try:
+        return json.loads(STATE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state: dict):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE.with_name(STATE.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, STATE)
+
+def up_to_date(stage: Stage, state: dict) -> bool:
+    rec = state.get(stage.name)
+    if stage.always or not rec:
+        return False
+    now = fingerprint(stage.inputs + stage.outputs)
+    outputs_exist = all(now[str(p)] is not None for p in stage.outputs)
+    return outputs_exist and now == rec
+
+def run(stages: list, state: dict, args) -> bool:
+    """Run stages in dependency order, independent ones concurrently; returns False if any failed."""
+    by_name = {s.name: s for s in stages}
+    status = {}  # name -> "ran" | "skipped" | "pending" (dry run) | "failed" | "blocked"
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while pending or running:
+            for s in list(pending):
+                deps = [d for d in s.deps if d in by_name]
+                if any(status.get(d) in ("failed", "blocked") for d in deps):
+                    status[s.name] = "blocked"
+                    pending.remove(s)
+                    print(f"[pipeline] {s.name}: blocked by a failed dependency")
+                    continue
+                if not all(d in status for d in deps):
+                    continue
+                pending.remove(s)
+                if args.dry_run and any(status.get(d) == "pending" for d in deps):
+                    status[s.name] = "pending"
+                    print(f"[pipeline] {s.name}: would run if upstream changes its inputs")
+                    continue
+                if not args.force and up_to_date(s, state):
+                    status[s.name] = "skipped"
+                    print(f"[pipeline] {s.name}: inputs unchanged, skipped")
+                    continue
+                if args.dry_run and not s.always:  # always-run stages (the page fetch) run for real
+                    status[s.name] = "pending"
+                    print(f"[pipeline] {s.name}: would run")
+                    continue
+                print(f"[pipeline] {s.name}: running")
+                running[pool.submit(timed_run, s, args)] = s
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                s = running.pop(fut)
+                try:
+                    took = fut.result()
+                except Exception as e:
+                    status[s.name] = "failed"
+                    print(f"[pipeline] {s.name}: FAILED ({e})", file=sys.stderr)
+                    continue
+                status[s.name] = "ran"
+                state[s.name] = fingerprint(s.inputs + s.outputs)
+                save_state(state)
+                print(f"[pipeline] {s.name}: done in {took:.1f}s")
+    if not args.dry_run:
+        # later stages may have rewritten earlier stages' files (the catalogue): record the final hashes
+        for name, v in status.items():
+            if v in ("ran", "skipped"):
+                state[name] = fingerprint(by_name[name].inputs + by_name[name].outputs)
+        save_state(state)
+    ran = [n for n, v in status.items() if v in ("ran", "pending") and not by_name[n].always]
+    verb = "would run" if args.dry_run else "ran"
+    print(f"[pipeline] {len(ran)} stage(s) {verb}" + ("" if ran else " - nothing changed"))
+    return not any(v in ("failed", "blocked") for v in status.values())
+
+def timed_run(stage: Stage, args) -> float:
+    t = time.perf_counter()
+    stage.run(args)
+    return time.perf_counter() - t
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Run the PACM data pipeline, skipping unchanged stages.")
+    ap.add_argument("--force", action="store_true", help="run every stage regardless of input hashes")
+    ap.add_argument("--only", nargs="+", choices=[s.name for s in STAGES], metavar="STAGE",
+                    help="run only these stages (their dependencies are assumed done)")
+    ap.add_argument("--dry-run", action="store_true", help="report which stages would run")
+    ap.add_argument("--offline", action="store_true", help="use the HTTP cache only")
+    ap.add_argument("--jobs", type=int, default=2, help="stages run concurrently when independent")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [s for s in STAGES if not args.only or s.name in args.only]
+    state = load_state()
+    sys.exit(0 if run(stages, state, args) else 1)
+
+if __name__ == "__main__":
+    main()
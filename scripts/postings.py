@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Sharded inverted index (term -> postings) over the full-text records.
+
+Terms are lowercased runs of letters/digits (JS: /[\\p{L}\\p{N}]+/gu); a document id
+is the record's position in search_index.json and positions are token offsets.
+A postings list is [doc, pos0, gap1, gap2, ...]. Shards are keyed by the first two
+characters of the term, folded (NFKD, combining marks dropped: "été" -> "et"), or
+by the folded first character alone when only that one is in [a-z0-9] ("aα" -> "a"),
+so a one-letter prefix search finds every term starting with that letter in the
+shards whose key starts with it. A term whose first character does not fold to
+[a-z0-9] (Arabic, Chinese, Cyrillic, ...) goes to one of NONLATIN_BUCKETS shards
+"_0".."_f" by its first two code points, so no single shard collects every
+non-Latin term. The client only fetches the shards its query needs;
+scripts/check_shard_keys.py checks that it computes the same keys.
+
+scripts/manifest.py writes the shards (with content-hash filenames) next to the
+per-document text shards; see assets/postings.js for the client side.
+"""
+import json, re, pathlib, unicodedata
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+SHARD_RE = re.compile(r"[a-z0-9]{1,2}")
+DEHYPHEN_RE = re.compile(r"-\s*\n\s*")
+NONLATIN_BUCKETS = 16
+
+def tokenize(text: str) -> list:
+    text = DEHYPHEN_RE.sub("", (text or "").replace("\u00ad", ""))
+    return TOKEN_RE.findall(text.lower())
+
+def fold(s: str) -> str:
+    """NFKD with combining marks dropped (JS: s.normalize('NFKD').replace(/\\p{M}/gu, ''))."""
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.category(c).startswith("M"))
+
+def shard_key(term: str) -> str:
+    """Must match shardKey() in assets/postings.js."""
+    k = fold(term[:2])[:2]
+    if SHARD_RE.fullmatch(k):
+        return k
+    if SHARD_RE.fullmatch(k[:1]):
+        return k[:1]
+    cps = [ord(c) for c in term[:2]] + [0]
+    return "_" + format((cps[0] * 31 + cps[1]) % NONLATIN_BUCKETS, "x")
+
+def iter_records(path: pathlib.Path):
+    """Yield records from a search index written one record per line; falls back to a full parse."""
+    with open(path, "rb") as f:
+        for line in f:
+            body = line.strip().rstrip(b",")
+            if not body.startswith(b"{"):
+                continue
+            try:
+                rec = json.loads(body)
+            except ValueError:
+                break
+            yield rec
+        else:
+            return
+    yield from json.loads(path.read_text(encoding="utf-8"))
+
+def add_postings(terms: dict, doc_id: int, text: str):
+    """Add one document's postings to terms (a defaultdict(list)); call in index order."""
+    positions = defaultdict(list)
+    for pos, tok in enumerate(tokenize(text)):
+        positions[tok].append(pos)
+    for tok, ps in positions.items():
+        terms[tok].append([doc_id, ps[0]] + [b - a for a, b in zip(ps, ps[1:])])
+
+def page_tokens(text: str, pages: list) -> list:
+    """Token position at which each page starts, from the record's page start offsets (characters);
+    tokens never straddle a page start, which always follows a space."""
+    out, n = [], 0
+    bounds = list(pages) + [len(text)]
+    for a, b in zip(bounds, bounds[1:]):
+        out.append(n)
+        n += len(tokenize(text[a:b]))
+    return out
+
+def shard_postings(terms: dict) -> dict:
+    """{key: {term: [postings, ...]}} with terms sorted inside each shard."""
+    out = defaultdict(dict)
+    for term in sorted(terms):
+        out[shard_key(term)][term] = terms[term]
+    return dict(out)
@@ -0,0 +1,21 @@
+# scripts/preserve_manual_fields.py
+# Carries section/subsection/notes from the previous catalogue over to a fresh scrape.
+# Usage: preserve_manual_fields.py OLD_CATALOGUE  (rewrites data/a64_catalogue.json in place)
+import sys, pathlib
+from catalogue import Catalogue, CAT
+
+def preserve(old, fresh):
+    cat = Catalogue(fresh)
+    cat.preserve_manual(Catalogue(old))
+    return cat.rows
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    old_path = pathlib.Path(argv[0]) if argv else pathlib.Path("/tmp/old_catalogue.json")
+    cat = Catalogue.load(CAT)
+    cat.preserve_manual(Catalogue.load(old_path))
+    cat.save()
+    print(f"Preserved manual fields for {len(cat)} items")
+
+if __name__ == "__main__":
+    main()
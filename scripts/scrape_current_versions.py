@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-UNFCCC A6.4 scraper (ENG-only, Current version only; ignore Forms)
+UNFCCC A6.4 scraper (Current version only; ignore Forms)
 Includes prior fixes + robust CMA Annual Reports/Addenda injection by symbol.
 - Exclude A6.4-FORM-AC-014 / -013 / -002 instruction PDFs
 - Robust title selection; symbol inference; SD tool tail trimmed
@@ -14,17 +14,27 @@ NEW:
   * 2023/15, 2023/15/Add.1
   * 2024/2,  2024/2/Add.1
 They are inserted with canonical symbol-search URLs on unfccc.int to keep them stable.
+- Single pass per page: walk_page() visits headings and tables once, in document
+  order, keeping the current h2/h3 and dispatching each table (and the CMA link
+  lists) as it goes; parse_pages() combines several pages (e.g. archived versions).
+- Languages: the English link is the row's url; the other language versions in
+  the same cell go to row["languages"] = {"fr": url, ...} (only when there are any),
+  which build_fulltext.py indexes into per-language manifests.
+- Version histories: a "version history" / "previous versions" link (or any page
+  link in such a column) goes to row["history"]; version_history.py crawls those
+  pages to fill "version" and "superseded".
+
+Usage: scrape_current_versions.py [URL ...] [--html FILE ...]
+(default: the current-versions page; --html parses saved pages instead of fetching)
 """
-import json, re
+import json, re, argparse
 from urllib.parse import urljoin
-import requests
 from bs4 import BeautifulSoup
+import http_cache
 
 BASE = "https://unfccc.int"
 URL  = BASE + "/process-and-meetings/bodies/constituted-bodies/article-64-supervisory-body/rules-and-regulations"
 
-S = requests.Session()
-S.headers.update({"User-Agent": "PACM-catalogue/1.7 (+github actions)"})
 TIMEOUT = 60
 
 FORM_EXCLUDE_RE = re.compile(r'(A6\.4-?FORM-AC-(014|013|002))', re.I)
@@ -33,6 +43,7 @@ VERSION_RE       = re.compile(r'^\s*(ver\.|version)\s*[.:]?\s*\d+(?:\.\d+)*\s*$'
 A64_SYMBOL_RE    = re.compile(r'(A6\.4-[A-Z]+(?:-[A-Z]+)*-\d{3})', re.I)
 UN_DOC_RE        = re.compile(r'(FCCC/PA/CMA/\d{4}/[\w./-]+)', re.I)
 DECISION_CODE_RE = re.compile(r'(\d+/CMA\.\d)', re.I)
+HISTORY_TEXT_RE  = re.compile(r'version history|previous versions?|superseded|history', re.I)
 
 # Static mapping for CMA Annual Reports/Addenda titles keyed by UN FCCC symbol
 ANNUAL_TITLES = {
@@ -45,9 +56,7 @@ ANNUAL_TITLES = {
 }
 
 def fetch(url):
-    r = S.get(url, timeout=TIMEOUT)
-    r.raise_for_status()
-    return r.text
+    return http_cache.get_text(url, timeout=TIMEOUT)
 
 def clean(s): return re.sub(r"\s+", " ", (s or "")).strip()
 
@@ -55,9 +64,48 @@ def nearest_headings(node):
     h2 = node.find_previous("h2")
     sec = clean(h2.get_text(" ")) if h2 else ""
     h3 = node.find_previous(["h3","h4"])
-    sub = clean(h3.get_text(" ")) if (h3 and (not h2 or getattr(h3, 'sourceline', 0) > getattr(h2, 'sourceline', 0))) else ""
+    # the subheading only counts if it sits under the same h2 (lxml gives no sourceline to compare)
+    sub = clean(h3.get_text(" ")) if (h3 and (not h2 or h3.find_previous("h2") is h2)) else ""
     return sec, sub
 
+# link text (or the file-name suffix, e.g. "..._fr.pdf") -> language code
+LANG_LABELS = {
+    "en": ("english", "eng", "en"), "fr": ("français", "francais", "french", "fra", "fr"),
+    "es": ("español", "espanol", "spanish", "esp", "spa", "es"), "ar": ("العربية", "arabic", "ara", "ar"),
+    "zh": ("中文", "chinese", "chi", "zho", "zh"), "ru": ("русский", "russian", "rus", "ru"),
+}
+LANG_BY_LABEL = {label: code for code, labels in LANG_LABELS.items() for label in labels}
+LANG_SUFFIX_RE = re.compile(r'[_-](en|fr|es|ar|zh|ru|eng|fra|spa|ara|chi|rus)\.pdf$', re.I)
+
+def link_lang(a):
+    """Language code of a document link, from its text or else its file name; None if neither says."""
+    code = LANG_BY_LABEL.get(clean(a.get_text(" ")).lower().rstrip("."))
+    if code:
+        return code
+    m = LANG_SUFFIX_RE.search(a.get("href", "").split("?")[0])
+    return LANG_BY_LABEL.get(m.group(1).lower()) if m else None
+
+def language_links(a_tags):
+    """{code: absolute url} for the non-English versions among a cell's links (first link per language)."""
+    out = {}
+    for a in a_tags:
+        code, href = link_lang(a), a.get("href", "")
+        if code and code != "en" and href and code not in out:
+            out[code] = urljoin(BASE, href)
+    return out
+
+def history_link(cells, idx_hist):
+    """Absolute URL of the row's version-history page: a link saying so anywhere in the row,
+    else the first non-PDF link in the history column; None if there is neither."""
+    for a in (a for c in cells for a in c.find_all("a", href=True)):
+        if HISTORY_TEXT_RE.search(clean(a.get_text(" "))):
+            return urljoin(BASE, a["href"])
+    if idx_hist is not None and idx_hist < len(cells):
+        for a in cells[idx_hist].find_all("a", href=True):
+            if not a["href"].lower().split("?")[0].endswith(".pdf"):
+                return urljoin(BASE, a["href"])
+    return None
+
 def english_link(a_tags):
     eng = [a for a in a_tags if "eng" in (a.get_text(" ") or "").lower() or "english" in (a.get_text(" ") or "").lower()]
     if eng: return eng[0]
@@ -154,8 +202,9 @@ def normalize_cma_annual_reports(record):
         record["type"] = "CMA report"
     return record
 
-def parse_current_table(table):
-    sec, sub = nearest_headings(table)
+def parse_current_table(table, headings=None):
+    """Rows of one document table; headings = (section, subsection) if the caller already knows them."""
+    sec, sub = headings if headings is not None else nearest_headings(table)
     if "forms" in sec.lower() or "forms" in sub.lower():
         return []
 
@@ -172,6 +221,7 @@ def parse_current_table(table):
         return None
 
     idx_cv   = col_idx("current version")
+    idx_hist = col_idx("version history", "previous version", "superseded")
     idx_ttl  = col_idx("title", "document", "document name", "name")
     idx_sym  = col_idx("symbol", "doc symbol")
     idx_date = col_idx("entry into force", "entry into force / date", "publication date", "date of entry into force", "date")
@@ -181,13 +231,13 @@ def parse_current_table(table):
         cells = tr.find_all(["td","th"])
         if not cells: continue
 
-        link = None
+        link, link_tags = None, []
         if idx_cv is not None and idx_cv < len(cells):
             link_tags = cells[idx_cv].find_all("a", href=True)
             if link_tags:
                 link = english_link(link_tags)
         if link is None:
-            link_tags = tr.find_all("a", href=True)
+            link_tags = [a for a in tr.find_all("a", href=True) if not HISTORY_TEXT_RE.search(clean(a.get_text(" ")))]
             if link_tags:
                 link = english_link(link_tags)
         if link is None: 
@@ -228,13 +278,26 @@ def parse_current_table(table):
         row = fix_symbol_date_swap(row)
         row = enforce_cma_decision_symbol(row)
         row = normalize_cma_annual_reports(row)
+        languages = language_links(link_tags)
+        languages.pop(next((k for k, v in languages.items() if v == url), None), None)
+        if languages:
+            row["languages"] = languages
+        history = history_link(cells, idx_hist)
+        if history:
+            row["history"] = history
         rows.append(row)
     return rows
 
+def is_cma_heading(tag):
+    return tag.name=="h2" and "cma related" in tag.get_text(" ").lower()
+
 def parse_cma(soup):
+    h2 = soup.find(is_cma_heading)
+    return parse_cma_section(h2) if h2 else []
+
+def parse_cma_section(h2):
+    """CMA decisions/reports listed as links between this h2 and the next sibling h2."""
     sec_title = "CMA related decisions and documents"
-    h2 = soup.find(lambda t: t.name=="h2" and "cma related" in t.get_text(" ").lower())
-    if not h2: return []
     items = []
     cur_sub = ""
     for sib in h2.next_siblings:
@@ -314,15 +377,32 @@ def ensure_static_cma_reports(records):
         })
     return records
 
-def main():
-    soup = BeautifulSoup(fetch(URL), "lxml")
+def walk_page(soup):
+    """(CMA records, table records) of one page in a single document-order pass.
+    Headings are tracked as they are met instead of searched backwards from every table."""
+    cma, tables = [], []
+    sec = sub = ""
+    seen_cma = False
+    for node in soup.find_all(["h2","h3","h4","table"]):
+        if node.name == "h2":
+            sec, sub = clean(node.get_text(" ")), ""
+            if not seen_cma and is_cma_heading(node):
+                seen_cma = True
+                cma += parse_cma_section(node)
+        elif node.name in ("h3","h4"):
+            sub = clean(node.get_text(" "))
+        else:
+            if "forms" in sec.lower() or "forms" in sub.lower(): continue
+            if "cma related decisions and documents" in sec.lower(): continue
+            tables += parse_current_table(node, (sec, sub))
+    return cma, tables
+
+def parse_pages(pages):
+    """Catalogue records for one or more rules-and-regulations pages (html strings, no network)."""
     recs = []
-    recs += parse_cma(soup)
-    for tb in soup.find_all("table"):
-        sec, sub = nearest_headings(tb)
-        if "forms" in sec.lower() or "forms" in sub.lower(): continue
-        if "cma related decisions and documents" in sec.lower(): continue
-        recs += parse_current_table(tb)
+    for html in pages:
+        cma, tables = walk_page(BeautifulSoup(html, "lxml"))
+        recs += cma + tables
 
     # Dedupe conservatively (same URL + same title)
     seen=set(); out=[]
@@ -335,6 +415,20 @@ def main():
     out = ensure_static_cma_reports(out)
 
     out.sort(key=lambda x: (x.get("section",""), x.get("subsection",""), x.get("symbol",""), x.get("title","")))
+    return out
+
+def parse_page(html):
+    """Catalogue records for the rules-and-regulations page html (no network)."""
+    return parse_pages([html])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scrape the A6.4 rules-and-regulations page(s) into data/a64_catalogue.json.")
+    ap.add_argument("urls", nargs="*", help=f"pages to scrape (default: {URL})")
+    ap.add_argument("--html", action="append", default=[], help="parse a saved page instead of fetching (repeatable)")
+    args = ap.parse_args(argv)
+    pages = [open(p, encoding="utf-8").read() for p in args.html]
+    pages += [fetch(u) for u in (args.urls or ([] if args.html else [URL]))]
+    out = parse_pages(pages)
 
     import os
     os.makedirs("data", exist_ok=True)
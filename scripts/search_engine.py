@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+BM25-ranked, phrase-aware search over data/search_index.json.
+
+Loads the index once through the mmap corpus store (scripts/corpus_store.py),
+keeps term -> {doc: positions} in memory (document text stays on disk) and answers
+queries with the same syntax as the site: bare words and "quoted phrases",
+all of which must match (--any: at least one). A trailing * makes a bare word
+a prefix query (revers*). Snippets highlight the matched tokens with <mark>.
+
+Usage:
+  search_engine.py query "reversal buffer" [--limit 10] [--json] [--any]
+  search_engine.py batch queries.txt [--limit 10]     # one query per line -> JSON lines
+  search_engine.py serve [--host 127.0.0.1] [--port 8001] [--cache 1024]
+
+serve exposes GET /search?q=...&limit=...&any=1, returning JSON
+{query, total, took_ms, hits:[{url,title,symbol,section,subsection[,lang,row_url][,aliases],score,snippet[,page]}]}.
+page is the PDF page of the snippet's match, when the record has a page map.
+A PDF listed by several catalogue rows is one hit; the other rows are its aliases.
+Other-language versions are separate hits with "lang" and the catalogue row's url as "row_url".
+Responses are kept in an LRU cache keyed by (q, limit, any).
+"""
+import json, re, sys, math, time, html, bisect, pathlib, argparse, functools
+from array import array
+from collections import defaultdict
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from postings import TOKEN_RE, DEHYPHEN_RE, tokenize
+from corpus_store import open_corpus
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+INDEX = ROOT / 'data' / 'search_index.json'
+
+K1, B = 1.2, 0.75
+SNIPPET_CHARS = 110
+QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+WS_RE = re.compile(r"\s+")
+META_KEYS = ("url", "title", "symbol", "section", "subsection")
+
+def clean_text(text: str) -> str:
+    return WS_RE.sub(" ", DEHYPHEN_RE.sub("", (text or "").replace("\u00ad", "")))
+
+def load(path: pathlib.Path = INDEX) -> dict:
+    corpus = open_corpus(path, path.with_suffix(".corpus"))
+    docs, lengths, starts, normalized, pages = [], [], [], [], []
+    terms = defaultdict(dict)
+    for doc_id, (meta, text) in enumerate(corpus):
+        cleaned = clean_text(text)
+        offs = array("I")
+        for n, m in enumerate(TOKEN_RE.finditer(cleaned)):
+            terms[m.group().lower()].setdefault(doc_id, []).append(n)
+            offs.append(m.start())
+        docs.append({k: meta[k] for k in META_KEYS + ("lang", "row_url", "aliases") if k in meta})
+        lengths.append(len(offs))
+        starts.append(offs)
+        normalized.append(cleaned == text)
+        pages.append(meta.get("pages") if cleaned == text else None)  # offsets into the normalised text only
+    return {
+        "docs": docs, "corpus": corpus, "lengths": lengths, "starts": starts, "normalized": normalized, "pages": pages,
+        "cleaned": functools.lru_cache(maxsize=64)(lambda doc: clean_text(corpus.text(doc))),
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "terms": dict(terms), "vocab": sorted(terms),
+    }
+
+def parse_query(q: str) -> list:
+    """[(tokens, prefix)] for every quoted phrase / bare word; prefix only for a bare word ending in *."""
+    parts = []
+    for m in QUERY_RE.finditer(q or ""):
+        raw = m.group(1) or m.group(2)
+        toks = tokenize(raw)
+        if toks:
+            parts.append((toks, m.group(2) is not None and raw.endswith("*") and len(toks) == 1))
+    return parts
+
+def term_positions(idx: dict, tok: str, prefix: bool) -> dict:
+    if not prefix:
+        return idx["terms"].get(tok, {})
+    out = defaultdict(list)
+    vocab = idx["vocab"]
+    for t in islice(vocab, bisect.bisect_left(vocab, tok), None):
+        if not t.startswith(tok):
+            break
+        for doc, ps in idx["terms"][t].items():
+            out[doc].extend(ps)
+    return {doc: sorted(ps) for doc, ps in out.items()}
+
+def part_matches(idx: dict, toks: list, prefix: bool) -> dict:
+    """doc -> start positions of the term / phrase."""
+    if len(toks) == 1:
+        return term_positions(idx, toks[0], prefix)
+    lists = [idx["terms"].get(t, {}) for t in toks]
+    out = {}
+    for doc, first in lists[0].items():
+        rest = [l.get(doc) for l in lists[1:]]
+        if not all(rest):
+            continue
+        sets = [set(r) for r in rest]
+        hits = [p for p in first if all(p + j + 1 in s for j, s in enumerate(sets))]
+        if hits:
+            out[doc] = hits
+    return out
+
+def snippet(idx: dict, doc: int, pos: int, words: set, prefixes: tuple) -> str:
+    # build-time normalised text (build_fulltext.py) is already clean; older indexes are cleaned on demand
+    text = idx["corpus"].text(doc) if idx["normalized"][doc] else idx["cleaned"](doc)
+    offs = idx["starts"][doc]
+    m = TOKEN_RE.match(text, offs[pos]) if pos < len(offs) else None
+    if m is None:
+        return html.escape(text[:2 * SNIPPET_CHARS])
+    a, b = max(0, m.start() - SNIPPET_CHARS), min(len(text), m.end() + SNIPPET_CHARS)
+    out, last = [], a
+    for t in TOKEN_RE.finditer(text, a, b):
+        low = t.group().lower()
+        if low in words or (prefixes and low.startswith(prefixes)):
+            out.append(html.escape(text[last:t.start()]) + "<mark>" + html.escape(t.group()) + "</mark>")
+            last = t.end()
+    out.append(html.escape(text[last:b]))
+    return ("… " if a > 0 else "") + "".join(out) + (" …" if b < len(text) else "")
+
+def page_of(idx: dict, doc: int, pos: int):
+    """1-based PDF page of token pos in doc, or None without a page map."""
+    pages, offs = idx["pages"][doc], idx["starts"][doc]
+    if not pages or pos >= len(offs):
+        return None
+    return bisect.bisect_right(pages, offs[pos]) or 1
+
+def search(idx: dict, q: str, limit: int = 10, any_part: bool = False) -> dict:
+    parts = parse_query(q)
+    matches = [part_matches(idx, toks, prefix) for toks, prefix in parts]
+    if not matches:
+        return {"query": q, "total": 0, "hits": []}
+    docs = set(matches[0])
+    for m in matches[1:]:
+        docs = docs | set(m) if any_part else docs & set(m)
+
+    n, avgdl, lengths = len(idx["docs"]), idx["avgdl"] or 1.0, idx["lengths"]
+    scores = {}
+    for m in matches:
+        idf = math.log(1 + (n - len(m) + 0.5) / (len(m) + 0.5))
+        for doc in docs.intersection(m):
+            tf = len(m[doc])
+            norm = K1 * (1 - B + B * lengths[doc] / avgdl)
+            scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+    words = {t for toks, _ in parts for t in toks}
+    prefixes = tuple(toks[0] for toks, prefix in parts if prefix)
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+    hits = []
+    for doc, score in ranked:
+        first = min(m[doc][0] for m in matches if doc in m)
+        hit = {**idx["docs"][doc], "score": round(score, 4), "snippet": snippet(idx, doc, first, words, prefixes)}
+        page = page_of(idx, doc, first)
+        if page:
+            hit["page"] = page
+        hits.append(hit)
+    return {"query": q, "total": len(scores), "hits": hits}
+
+def serve(idx: dict, host: str, port: int, cache_size: int):
+    @functools.lru_cache(maxsize=cache_size)
+    def answer(q, limit, any_part):
+        t = time.perf_counter()
+        res = search(idx, q, limit, any_part)
+        res["took_ms"] = round((time.perf_counter() - t) * 1000, 3)
+        return json.dumps(res, ensure_ascii=False).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            u = urlparse(self.path)
+            if u.path != "/search":
+                self.send_error(404)
+                return
+            qs = parse_qs(u.query)
+            try:
+                limit = max(1, min(int(qs.get("limit", ["10"])[0]), 1000))
+            except ValueError:
+                self.send_error(400, "limit must be an integer")
+                return
+            body = answer(qs.get("q", [""])[0], limit, qs.get("any", ["0"])[0] not in ("", "0"))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {len(idx['docs'])} docs on http://{host}:{port}/search?q=...")
+    httpd.serve_forever()
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="BM25 search over data/search_index.json.")
+    ap.add_argument("--index", type=pathlib.Path, default=INDEX)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("query", help="run one query")
+    p.add_argument("q")
+    p.add_argument("--json", action="store_true", help="print the raw JSON result")
+    b = sub.add_parser("batch", help="run one query per line of a file ('-' = stdin), print JSON lines")
+    b.add_argument("file")
+    for sp in (p, b):
+        sp.add_argument("--limit", type=int, default=10)
+        sp.add_argument("--any", action="store_true", help="match any part instead of all")
+    s = sub.add_parser("serve", help="local HTTP query endpoint")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8001)
+    s.add_argument("--cache", type=int, default=1024, help="LRU result cache size")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.index.exists():
+        print(f"ERROR: {args.index} not found", file=sys.stderr)
+        sys.exit(1)
+    idx = load(args.index)
+    if args.cmd == "serve":
+        serve(idx, args.host, args.port, args.cache)
+    elif args.cmd == "batch":
+        src = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+        with src:
+            for line in src:
+                if line.strip():
+                    print(json.dumps(search(idx, line.strip(), args.limit, args.any), ensure_ascii=False))
+    else:
+        t = time.perf_counter()
+        res = search(idx, args.q, args.limit, args.any)
+        took = (time.perf_counter() - t) * 1000
+        if args.json:
+            print(json.dumps(res, ensure_ascii=False, indent=2))
+            return
+        print(f"{res['total']} documents match ({took:.1f} ms)")
+        for i, h in enumerate(res["hits"], 1):
+            snip = re.sub(r"</?mark>", "**", html.unescape(h["snippet"]))
+            url = f"{h['url'].split('#')[0]}#page={h['page']}" if h.get("page") else h["url"]
+            print(f"{i:>3}. [{h['score']:.2f}] {h['title']} ({h['symbol']})\n     {url}\n     {snip}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Crawls every catalogue document's version-history page and fills in its version.
+
+Reads:  data/a64_catalogue.json        rows with a "history" URL (scrape_current_versions.py)
+Writes: data/version_history.json      every version seen, per document
+        data/a64_catalogue.json        "version" = the current version number,
+                                       "superseded" = [{version, date, url}], newest first
+
+A history page is any page listing a document's versions: every link whose text
+gives a version number ("Ver. 02.0", "Version 3.1", "v1"), or whose table row (or
+list item) does with "Ver."/"Version" spelled out, counts as that version, dated by the first date in the same row ("31 Mar. 2024"
+or "2024-03-31"). The highest version number is the current one, the others are
+superseded.
+
+version_history.json:
+  {"history": 1, "documents": {key: {"symbol", "history", "seen", "error",
+                                     "current": {version, date, url},
+                                     "superseded": [{version, date, url}, ...]}}}
+key is the normalised symbol, or the row's canonical URL when it has none; "seen"
+is the day the crawler first found the current version.
+version_at(entry, date) gives the version in force on a given day, e.g.
+  version_history.py --at A6.4-STAN-METH-001 2024-06-30
+
+History pages are fetched on a pool of --jobs threads through scripts/http_cache.py
+(conditional requests, so an unchanged page costs a 304), with at most --rate
+requests per second to any one host; --offline crawls the HTTP cache only. A page
+that cannot be fetched keeps its previous entry and is reported.
+
+A document whose current version number or URL differs from the previous crawl
+is "changed"; --changed FILE writes their catalogue URLs for
+build_fulltext.py --urls FILE, and --rebuild runs that targeted build directly,
+so only new versions are downloaded and extracted.
+
+History URLs are followed as given, so the crawler runs offline against a local
+fixture server (python3 -m http.server with saved history pages and a catalogue
+whose "history" URLs point at it).
+
+Usage: version_history.py [--catalogue PATH] [--store PATH] [--jobs N] [--rate R] [--offline]
+                          [--changed FILE] [--rebuild] [--at SYMBOL DATE]
+"""
+import re, sys, json, time, datetime, pathlib, argparse, tempfile, threading
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup
+import http_cache
+from catalogue import Catalogue, CAT, normalize_symbol, parse_day
+
+STORE = pathlib.Path("data") / "version_history.json"
+STORE_VERSION = 1
+JOBS = 8
+RATE = 2.0           # requests per second per host
+TIMEOUT = 60
+
+VERSION_RE = re.compile(r"\b(?:ver(?:sion)?\.?|v)\s*(\d{1,3}(?:\.\d{1,3}){0,2})\b", re.I)
+# the rest of a row also holds symbols, file names and notes: a bare "v1" there is not a version
+ROW_VERSION_RE = re.compile(r"\b(?:ver\.|version)\s*(\d{1,3}(?:\.\d{1,3}){0,2})\b", re.I)
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart, across threads."""
+    def __init__(self, rate: float = RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def version_key(v: str):
+    return tuple(int(p) for p in v.split("."))
+
+def parse_date(text: str):
+    """The first date in text as YYYY-MM-DD, or ""."""
+    m = ISO_DATE_RE.search(text)
+    if m:
+        try:
+            return datetime.date(int(m.group(1)), int(m.group(2)), int(m.group(3))).isoformat()
+        except ValueError:
+            pass
+    day = parse_day(text)
+    return day.isoformat() if day else ""
+
+def parse_history(html: str, page_url: str) -> list:
+    """[{version, date, url}] listed on a history page, newest version first (one link per version)."""
+    soup = BeautifulSoup(html, "lxml")
+    found = {}
+    for a in soup.find_all("a", href=True):
+        url = urljoin(page_url, a["href"])
+        if url.split("#")[0] == page_url.split("#")[0]:
+            continue
+        box = a.find_parent(["tr", "li"]) or a.parent
+        text = " ".join(box.get_text(" ").split())
+        m = VERSION_RE.search(" ".join(a.get_text(" ").split())) or ROW_VERSION_RE.search(text)
+        if not m:
+            continue
+        v = m.group(1)
+        # several links per version (languages, formats): the first PDF wins
+        if v not in found or (not found[v]["url"].lower().endswith(".pdf") and url.lower().endswith(".pdf")):
+            found[v] = {"version": v, "date": parse_date(text), "url": url}
+    return sorted(found.values(), key=lambda d: version_key(d["version"]), reverse=True)
+
+def doc_key(row: dict) -> str:
+    return normalize_symbol(row.get("symbol") or "") or http_cache.canonical_url(row.get("url") or "")
+
+def version_at(entry: dict, when: datetime.date):
+    """The {version, date, url} in force on day when: the latest dated version not after it, or None."""
+    dated = [v for v in [entry["current"], *entry["superseded"]] if v and v.get("date")]
+    dated = [v for v in dated if datetime.date.fromisoformat(v["date"]) <= when]
+    return max(dated, key=lambda v: (v["date"], version_key(v["version"])), default=None)
+
+def load_store(path: pathlib.Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("documents", {}) if data.get("history") == STORE_VERSION else {}
+
+def save_store(path: pathlib.Path, docs: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"history": STORE_VERSION, "documents": docs}, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+def crawl(pages: set, jobs: int = JOBS, rate: float = RATE) -> dict:
+    """{history url: [{version, date, url}] or an error string}, fetched concurrently and rate-limited per host."""
+    limiter = HostRateLimiter(rate)
+    def one(url):
+        if not http_cache.OFFLINE:
+            limiter.wait(url)
+        try:
+            return parse_history(http_cache.get_text(url, timeout=TIMEOUT), url)
+        except http_cache.CacheMiss:
+            return "offline: not in the HTTP cache"
+        except Exception as e:
+            return f"fetch: {type(e).__name__}: {e}"
+    out = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futs = {pool.submit(one, url): url for url in pages}
+        for fut in as_completed(futs):
+            out[futs[fut]] = fut.result()
+    return out
+
+def update(cat: Catalogue, store: dict, results: dict) -> tuple:
+    """Apply crawl results to the store and the catalogue rows; returns (changed rows, errors)."""
+    changed, errors = [], {}
+    today = datetime.date.today().isoformat()
+    for row in cat:
+        page = row.get("history")
+        if not page or page not in results:
+            continue
+        key, found = doc_key(row), results[page]
+        old = store.get(key)
+        if isinstance(found, str):
+            errors[key] = found
+            if old:
+                old["error"] = found
+        elif found:
+            cur = old and old["current"]
+            new = not cur or (cur["version"], cur["url"]) != (found[0]["version"], found[0]["url"])
+            if new:
+                changed.append(row)
+            store[key] = {"symbol": row.get("symbol") or "", "history": page, "seen": today if new else old["seen"],
+                          "error": None, "current": found[0], "superseded": found[1:]}
+        entry = store.get(key)
+        if entry and entry["current"]:
+            row["version"] = entry["current"]["version"]
+            if entry["superseded"]:
+                row["superseded"] = entry["superseded"]
+            else:
+                row.pop("superseded", None)
+    return changed, errors
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Crawl version-history pages and fill the catalogue's version field.")
+    ap.add_argument("--catalogue", type=pathlib.Path, default=CAT)
+    ap.add_argument("--store", type=pathlib.Path, default=STORE)
+    ap.add_argument("--jobs", type=int, default=JOBS, help=f"concurrent fetches (default {JOBS})")
+    ap.add_argument("--rate", type=float, default=RATE, help=f"max requests per second per host (default {RATE})")
+    ap.add_argument("--offline", action="store_true", help="use the HTTP cache only")
+    ap.add_argument("--changed", type=pathlib.Path, metavar="FILE",
+                    help="write the URLs of documents with a new version, for build_fulltext.py --urls")
+    ap.add_argument("--rebuild", action="store_true",
+                    help="run build_fulltext.py --urls on the changed documents afterwards")
+    ap.add_argument("--at", nargs=2, metavar=("SYMBOL", "DATE"),
+                    help="only print the version of SYMBOL in force on DATE (YYYY-MM-DD), from the store")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.offline:
+        http_cache.set_offline()
+    store = load_store(args.store)
+    if args.at:
+        entry = store.get(normalize_symbol(args.at[0]))
+        if not entry:
+            sys.exit(f"{args.at[0]}: no version history recorded")
+        v = version_at(entry, datetime.date.fromisoformat(args.at[1]))
+        print(f"{args.at[0]} on {args.at[1]}: " + (f"version {v['version']} of {v['date']} {v['url']}" if v
+                                                  else "no version dated on or before that day"))
+        return
+
+    cat = Catalogue.load(args.catalogue)
+    pages = {r["history"] for r in cat if r.get("history")}
+    t = time.perf_counter()
+    results = crawl(pages, args.jobs, args.rate)
+    changed, errors = update(cat, store, results)
+    cat.save()
+    save_store(args.store, store)
+    print(f"Crawled {len(pages)} history pages in {time.perf_counter() - t:.1f}s: "
+          f"{len(store)} documents with versions, {len(changed)} changed, {len(errors)} failed")
+    for key, err in sorted(errors.items()):
+        print(f"  {key:<32} {err}")
+
+    urls = sorted({r["url"] for r in changed if r.get("url")})
+    if not (args.changed or args.rebuild):
+        return
+    with tempfile.TemporaryDirectory(prefix="versions-") as tmp:
+        path = args.changed or pathlib.Path(tmp) / "changed.txt"
+        path.write_text("".join(u + "\n" for u in urls), encoding="utf-8")
+        if args.changed:
+            print(f"Wrote {len(urls)} changed document URLs to {path}")
+        if args.rebuild and urls:
+            import build_fulltext
+            build_fulltext.main(["--urls", str(path), *(["--offline"] if args.offline else [])])
+
+if __name__ == "__main__":
+    main()